@@ -0,0 +1,172 @@
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from dotenv import load_dotenv
+from fastapi import Request
+
+from exceptions.handlers import handle_exception
+from utils.metrics_utils import record_login_rejection
+
+load_dotenv()
+
+LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() in ("1", "true", "yes")
+# attempts one client IP may burst, refilled at LOGIN_IP_RATE_PER_MINUTE
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_RATE_PER_MINUTE = float(os.getenv("LOGIN_IP_RATE_PER_MINUTE", "30"))
+# failed attempts one account may take within LOGIN_ACCOUNT_WINDOW_SECONDS
+LOGIN_ACCOUNT_MAX_FAILURES = int(os.getenv("LOGIN_ACCOUNT_MAX_FAILURES", "10"))
+LOGIN_ACCOUNT_WINDOW_SECONDS = float(os.getenv("LOGIN_ACCOUNT_WINDOW_SECONDS", "300"))
+# IPs and accounts tracked per limiter, the least recently seen are dropped first
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+
+
+# token bucket per key: `burst` tokens refilled at `rate` per second.
+# only touched from the event loop, so it needs no locking
+class TokenBucketLimiter:
+    def __init__(self, burst: int, rate: float, maxsize: int) -> None:
+        self.burst = burst
+        self.rate = rate
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    # takes a token, or returns the seconds until one is available
+    def acquire(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, stamp = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / self.rate if self.rate > 0 else math.inf
+        self._buckets[key] = (tokens, now)
+        self._evict()
+        return retry_after
+
+    def _evict(self) -> None:
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# at most `limit` events per key in any `window` seconds, counted exactly
+class SlidingWindowLimiter:
+    def __init__(self, limit: int, window: float, maxsize: int) -> None:
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._events: OrderedDict[str, deque[float]] = OrderedDict()
+
+    def _recent(self, key: str, now: float) -> deque[float] | None:
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return None
+        return events
+
+    # seconds until the key may try again, 0 when it is under the limit
+    def retry_after(self, key: str) -> float:
+        now = time.monotonic()
+        events = self._recent(key, now)
+        if events is None or len(events) < self.limit:
+            return 0.0
+        return events[-self.limit] + self.window - now
+
+    def hit(self, key: str) -> None:
+        now = time.monotonic()
+        events = self._recent(key, now)
+        if events is None:
+            events = self._events[key] = deque(maxlen=max(self.limit, 1))
+        events.append(now)
+        self._events.move_to_end(key)
+        while len(self._events) > self.maxsize:
+            self._events.popitem(last=False)
+            self.evictions += 1
+
+    def reset(self, key: str) -> None:
+        self._events.pop(key, None)
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+# guards one token endpoint. check() runs before the DB lookup and bcrypt, so a
+# rejected attempt costs a couple of dict operations. every attempt spends a
+# token of the client IP's bucket; only failures count against the account,
+# so its owner is locked out by someone guessing but not by logging in often
+class LoginThrottle:
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = LOGIN_THROTTLE_ENABLED,
+        ip_burst: int = LOGIN_IP_BURST,
+        ip_rate_per_minute: float = LOGIN_IP_RATE_PER_MINUTE,
+        account_max_failures: int = LOGIN_ACCOUNT_MAX_FAILURES,
+        account_window_seconds: float = LOGIN_ACCOUNT_WINDOW_SECONDS,
+        max_keys: int = LOGIN_THROTTLE_MAX_KEYS,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.ips = TokenBucketLimiter(ip_burst, ip_rate_per_minute / 60, max_keys)
+        self.accounts = SlidingWindowLimiter(account_max_failures, account_window_seconds, max_keys)
+
+    @staticmethod
+    def account_key(email: str) -> str:
+        return email.strip().lower()
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        record_login_rejection(self.name, reason)
+        seconds = "3600" if math.isinf(retry_after) else str(max(1, math.ceil(retry_after)))
+        handle_exception(429, "Too many login attempts, please try again later", headers={"Retry-After": seconds})
+
+    def check(self, request: Request, email: str) -> None:
+        if not self.enabled:
+            return
+        # behind a reverse proxy run uvicorn with --proxy-headers so this is the real client
+        ip = request.client.host if request.client else "unknown"
+        retry_after = self.accounts.retry_after(self.account_key(email))
+        if retry_after > 0:
+            self._reject("account", retry_after)
+        retry_after = self.ips.acquire(ip)
+        if retry_after > 0:
+            self._reject("ip", retry_after)
+
+    def failed(self, email: str) -> None:
+        if self.enabled:
+            self.accounts.hit(self.account_key(email))
+
+    def succeeded(self, email: str) -> None:
+        if self.enabled:
+            self.accounts.reset(self.account_key(email))
+
+    def clear(self) -> None:
+        self.ips.clear()
+        self.accounts.clear()
+
+    def stats(self) -> dict:
+        return {
+            "ips": len(self.ips),
+            "accounts": len(self.accounts),
+            "evictions": self.ips.evictions + self.accounts.evictions,
+        }
+
+
+user_login_throttle = LoginThrottle("users")
+admin_login_throttle = LoginThrottle("admins")
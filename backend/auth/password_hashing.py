@@ -0,0 +1,189 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from dotenv import load_dotenv
+
+from exceptions.handlers import handle_exception
+from utils.metrics_utils import record_password_hash
+
+load_dotenv()
+
+# bcrypt and hashlib.scrypt release the GIL, so a thread pool gives real parallelism without pickling
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# how many calls may wait for a free worker before new ones are rejected
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
+# algorithm new hashes are made with; stored hashes of the other one still verify
+PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "bcrypt")
+
+# "production" costs are the ones to deploy with, "test" makes a hash take
+# about a millisecond for test and benchmark environments. the variables
+# below override single parameters of the profile
+PASSWORD_HASH_PROFILES = {
+    "production": {"bcrypt_rounds": 12, "scrypt_log_n": 15, "scrypt_r": 8, "scrypt_p": 1},
+    "test": {"bcrypt_rounds": 4, "scrypt_log_n": 10, "scrypt_r": 8, "scrypt_p": 1},
+}
+PASSWORD_HASH_PROFILE = os.getenv("PASSWORD_HASH_PROFILE", "production")
+if PASSWORD_HASH_PROFILE not in PASSWORD_HASH_PROFILES:
+    raise RuntimeError(f"Unknown PASSWORD_HASH_PROFILE: {PASSWORD_HASH_PROFILE}")
+
+_profile = PASSWORD_HASH_PROFILES[PASSWORD_HASH_PROFILE]
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", _profile["bcrypt_rounds"]))
+SCRYPT_LOG_N = int(os.getenv("SCRYPT_LOG_N", _profile["scrypt_log_n"]))
+SCRYPT_R = int(os.getenv("SCRYPT_R", _profile["scrypt_r"]))
+SCRYPT_P = int(os.getenv("SCRYPT_P", _profile["scrypt_p"]))
+
+
+# "$2b$12$..." hashes, the format every existing account has
+class BcryptHasher:
+    name = "bcrypt"
+
+    def __init__(self, rounds: int) -> None:
+        self.rounds = rounds
+
+    def identifies(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(("$2a$", "$2b$", "$2y$"))
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)).decode("utf-8")
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return int(hashed_password.split("$")[2]) != self.rounds
+
+
+# "$scrypt$ln=15,r=8,p=1$<salt>$<key>" with unpadded base64 salt and key
+class ScryptHasher:
+    name = "scrypt"
+    prefix = "$scrypt$"
+
+    def __init__(self, log_n: int, r: int, p: int) -> None:
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+
+    def identifies(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(self.prefix)
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+        n = 1 << log_n
+        # scrypt needs about 128 * r * n bytes, above hashlib's 32 MiB default from ln=15 r=8
+        return hashlib.scrypt(
+            password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * r * (n + p), dklen=32
+        )
+
+    @staticmethod
+    def _b64(data: bytes) -> str:
+        return base64.b64encode(data).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _unb64(text: str) -> bytes:
+        return base64.b64decode(text + "=" * (-len(text) % 4))
+
+    def _parse(self, hashed_password: str) -> tuple[dict, bytes, bytes]:
+        _, _, params, salt, key = hashed_password.split("$")
+        settings = {name: int(value) for name, value in (item.split("=") for item in params.split(","))}
+        return settings, self._unb64(salt), self._unb64(key)
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        key = self._derive(password, salt, self.log_n, self.r, self.p)
+        return f"{self.prefix}ln={self.log_n},r={self.r},p={self.p}${self._b64(salt)}${self._b64(key)}"
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        settings, salt, key = self._parse(hashed_password)
+        derived = self._derive(password, salt, settings["ln"], settings["r"], settings["p"])
+        return hmac.compare_digest(derived, key)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        settings, _, _ = self._parse(hashed_password)
+        return (settings["ln"], settings["r"], settings["p"]) != (self.log_n, self.r, self.p)
+
+
+HASHERS = {
+    "bcrypt": BcryptHasher(BCRYPT_ROUNDS),
+    "scrypt": ScryptHasher(SCRYPT_LOG_N, SCRYPT_R, SCRYPT_P),
+}
+if PASSWORD_HASH_ALGORITHM not in HASHERS:
+    raise RuntimeError(f"Unknown PASSWORD_HASH_ALGORITHM: {PASSWORD_HASH_ALGORITHM}")
+hasher = HASHERS[PASSWORD_HASH_ALGORITHM]
+
+
+def _hasher_of(hashed_password: str):
+    for candidate in HASHERS.values():
+        if candidate.identifies(hashed_password):
+            return candidate
+    return None
+
+
+# synchronous API, blocks for the full cost of the hash; async code goes
+# through PasswordHashServiceClass so the event loop is never held up
+def hash_password(password: str) -> str:
+    return hasher.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    stored = _hasher_of(hashed_password)
+    return stored is not None and stored.verify(password, hashed_password)
+
+
+# whether a hash was made with another algorithm or other costs than the current ones
+def needs_rehash(hashed_password: str) -> bool:
+    stored = _hasher_of(hashed_password)
+    return stored is not hasher or stored.needs_rehash(hashed_password)
+
+
+# verifies and, when the stored hash is outdated, rehashes in the same worker
+# call. returns (valid, new hash or None)
+def verify_and_update(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    if not verify_password(password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, hash_password(password)
+    return True, None
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+class PasswordHashServiceClass:
+    # calls running or waiting on the pool, only touched from the event loop
+    in_flight = 0
+
+    @staticmethod
+    async def _run(func, *args):
+        if PasswordHashServiceClass.in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE:
+            handle_exception(503, "Server is busy, please try again later")
+
+        PasswordHashServiceClass.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, func, *args)
+        finally:
+            PasswordHashServiceClass.in_flight -= 1
+            record_password_hash(time.perf_counter() - start)
+
+    @staticmethod
+    async def hash_password(password: str) -> str:
+        return await PasswordHashServiceClass._run(hash_password, password)
+
+    @staticmethod
+    async def verify_password(password: str, hashed_password: str) -> bool:
+        return await PasswordHashServiceClass._run(verify_password, password, hashed_password)
+
+    @staticmethod
+    async def verify_and_update(password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await PasswordHashServiceClass._run(verify_and_update, password, hashed_password)
@@ -0,0 +1,39 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from utils.cache_utils import TTLCache
+
+load_dotenv()
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# the cache is per process, so with several workers a change made through one
+# of them is seen by the others only once their entry expires
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+
+# what authenticated routes get instead of a session-bound ORM row;
+# write paths load the row themselves
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    email: str
+    username: str
+    is_admin: bool
+    date_created: datetime
+
+    @classmethod
+    def from_orm(cls, obj) -> "Principal":
+        return cls(
+            id=obj.id,
+            email=obj.email,
+            username=obj.username,
+            is_admin=bool(obj.is_admin),
+            date_created=obj.date_created,
+        )
+
+
+user_principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+admin_principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
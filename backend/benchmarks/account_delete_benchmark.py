@@ -0,0 +1,75 @@
+"""Cost of deleting an account that owns a large number of blogs.
+
+Seeds two users with `--blogs` blogs each (and their full-text rows), then
+deletes one through DELETE /users/me and the other through the admin route
+DELETE /users/{user_id}. Reports wall time and SQL statements for each and
+checks that no blog or search row of the deleted owners is left behind.
+
+    cd backend
+    python -m benchmarks.account_delete_benchmark --blogs 100000
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+
+from benchmarks import harness
+
+ADMIN_EMAIL = "admin@example.org"
+
+
+def index_blogs(db_path: str) -> None:
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO blogs_fts (rowid, title, content) SELECT id, title, content FROM blogs")
+    conn.close()
+
+
+# blogs are seeded owner by owner, so owner n holds ids (n - 1) * blogs + 1 .. n * blogs
+def leftovers(db_path: str, owner_id: int, blogs: int) -> dict:
+    conn = sqlite3.connect(db_path)
+    blogs_left = conn.execute("SELECT count(*) FROM blogs WHERE owner_id = ?", (owner_id,)).fetchone()[0]
+    fts = conn.execute(
+        "SELECT count(*) FROM blogs_fts WHERE rowid BETWEEN ? AND ?",
+        ((owner_id - 1) * blogs + 1, owner_id * blogs),
+    ).fetchone()[0]
+    conn.close()
+    return {"blogs_left": blogs_left, "fts_rows_left": fts}
+
+
+async def timed_delete(http, path: str, headers: dict) -> dict:
+    with harness.QueryCounter() as counter, harness.Timer() as timer:
+        response = await http.delete(path, headers=headers)
+    response.raise_for_status()
+    return {"seconds": round(timer.elapsed, 3), "statements": counter.count}
+
+
+async def main(blogs: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=2, blogs_per_user=blogs)
+    index_blogs(db_path)
+
+    async with harness.client() as http:
+        user_headers = await harness.login(http, emails[0])
+        await http.post(
+            "/admins", json={"email": ADMIN_EMAIL, "username": "admin", "password": harness.BENCH_PASSWORD}
+        )
+        admin_headers = await harness.login(http, ADMIN_EMAIL, path="/admins/token")
+        # resolve both principals up front so only the delete is measured
+        await http.get("/users/me", headers=user_headers)
+        await http.get("/admins/me", headers=admin_headers)
+
+        own = await timed_delete(http, "/users/me", user_headers)
+        own.update(leftovers(db_path, 1, blogs))
+        by_admin = await timed_delete(http, "/users/2", admin_headers)
+        by_admin.update(leftovers(db_path, 2, blogs))
+
+    return {"blogs_per_user": blogs, "delete_me": own, "admin_delete": by_admin}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.blogs)), indent=2))
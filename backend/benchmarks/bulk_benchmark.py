@@ -0,0 +1,80 @@
+"""Throughput of the bulk blog endpoints against the single-item ones.
+
+The same number of blogs is created, updated and deleted once one request
+per blog and once through /blogs/bulk in batches.
+
+    cd backend
+    python -m benchmarks.bulk_benchmark --blogs 5000 --batch 1000
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks import harness
+
+
+def rate(count: int, timer: harness.Timer) -> float:
+    return round(count / timer.elapsed, 1)
+
+
+async def single_item(http, headers: dict, blogs: int) -> dict:
+    ids = []
+    with harness.Timer() as create:
+        for n in range(blogs):
+            response = await http.post("/blogs", json={"title": f"s{n}", "content": "c" * 500}, headers=headers)
+            ids.append(response.json()["id"])
+    with harness.Timer() as update:
+        for blog_id in ids:
+            await http.put(f"/blogs/{blog_id}", json={"title": "u", "content": "d" * 500}, headers=headers)
+    with harness.Timer() as delete:
+        for blog_id in ids:
+            await http.delete(f"/blogs/{blog_id}", headers=headers)
+    return {
+        "create_per_second": rate(blogs, create),
+        "update_per_second": rate(blogs, update),
+        "delete_per_second": rate(blogs, delete),
+    }
+
+
+async def bulk(http, headers: dict, blogs: int, batch: int) -> dict:
+    ids = []
+    with harness.Timer() as create:
+        for start in range(0, blogs, batch):
+            payload = [{"title": f"b{n}", "content": "c" * 500} for n in range(start, min(blogs, start + batch))]
+            response = await http.post("/blogs/bulk", json=payload, headers=headers)
+            ids.extend(item["id"] for item in response.json())
+    with harness.Timer() as update:
+        for start in range(0, blogs, batch):
+            payload = [{"id": i, "title": "u", "content": "d" * 500} for i in ids[start:start + batch]]
+            await http.patch("/blogs/bulk", json=payload, headers=headers)
+    with harness.Timer() as delete:
+        for start in range(0, blogs, batch):
+            await http.request("DELETE", "/blogs/bulk", json=ids[start:start + batch], headers=headers)
+    return {
+        "create_per_second": rate(blogs, create),
+        "update_per_second": rate(blogs, update),
+        "delete_per_second": rate(blogs, delete),
+    }
+
+
+async def main(blogs: int, batch: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1)
+
+    async with harness.client() as http:
+        headers = await harness.login(http, emails[0])
+        return {
+            "blogs": blogs,
+            "batch": batch,
+            "single_item": await single_item(http, headers, blogs),
+            "bulk": await bulk(http, headers, blogs, batch),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.blogs, args.batch)), indent=2))
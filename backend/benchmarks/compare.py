@@ -0,0 +1,61 @@
+"""Diff two benchmark suite reports and flag regressions.
+
+A scenario regresses when its p95 latency or queries per request grow, or
+its requests/s drop, by more than the threshold. Exits with status 1 when
+anything regressed, so it can gate a release.
+
+    cd backend
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when a higher value is better
+METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "requests_per_second": True,
+    "queries_per_request": False,
+}
+GATED = ("p95_ms", "requests_per_second", "queries_per_request")
+
+
+def change(before: float, after: float) -> float:
+    if before == 0:
+        return 0.0 if after == 0 else float("inf")
+    return (after - before) / before * 100
+
+
+def compare(before: dict, after: dict, threshold: float) -> tuple[list[str], bool]:
+    lines = [f"  {'metric':<22}{'before':>12}{'after':>12}{'change':>11}"]
+    regressed = False
+    for name, old in before["scenarios"].items():
+        new = after["scenarios"].get(name)
+        if new is None:
+            lines.append(f"{name}: missing from the second report")
+            continue
+        lines.append(name)
+        for metric, higher_is_better in METRICS.items():
+            delta = change(old[metric], new[metric])
+            worse = -delta if higher_is_better else delta
+            flag = ""
+            if metric in GATED and worse > threshold:
+                flag = "  REGRESSION"
+                regressed = True
+            lines.append(f"  {metric:<22}{old[metric]:>12}{new[metric]:>12}{delta:>+10.1f}%{flag}")
+    return lines, regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    with open(args.before) as before, open(args.after) as after:
+        lines, regressed = compare(json.load(before), json.load(after), args.threshold)
+    print("\n".join(lines))
+    sys.exit(1 if regressed else 0)
@@ -0,0 +1,144 @@
+"""Database size and read throughput with blog content stored compressed.
+
+Seeds `--blogs` posts of generated English-like prose (a Zipf-distributed
+vocabulary in sentences and paragraphs, post lengths log-normal around
+`--median-size` bytes, full-text index included) and measures, before and
+after running migrations.blog_content_compression_migration and VACUUM:
+
+- the database file, blogs table and full-text index sizes,
+- GET /blogs/{id} and GET /all/blogs?view=full throughput, latency and the
+  response bytes sent with and without Accept-Encoding: gzip.
+
+    cd backend
+    python -m benchmarks.compression_benchmark --blogs 20000 --threshold 1024
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from benchmarks import harness
+
+VOCABULARY_SIZE = 5000
+SYLLABLES = ("ka", "lo", "ve", "tri", "on", "mar", "es", "ul", "pen", "di", "sto", "ra", "in", "gel", "th", "ou")
+
+
+def make_corpus(count: int, median_size: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.choice((1, 1, 2, 2, 3, 4))))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+
+    posts = []
+    for _ in range(count):
+        target = min(int(rng.lognormvariate(0, 0.8) * median_size), 100_000)
+        paragraphs, size = [], 0
+        while size < target:
+            sentences = []
+            for _ in range(rng.randint(3, 7)):
+                sentence = " ".join(rng.choices(words, weights, k=rng.randint(6, 20)))
+                sentences.append(sentence.capitalize() + rng.choice((".", ".", ".", "?", "!")))
+            paragraphs.append(" ".join(sentences))
+            size += len(paragraphs[-1]) + 2
+        posts.append("\n\n".join(paragraphs)[:target])
+    return posts
+
+
+def seed_corpus(db_path: str, owner_id: int, posts: list[str]) -> None:
+    start = datetime.utcnow()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO blogs (title, content, created_at, updated_at, owner_id) VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"post {n}", content, stamp, stamp, owner_id)
+                for n, content in enumerate(posts)
+                for stamp in [(start + timedelta(microseconds=n)).isoformat(sep=" ")]
+            ),
+        )
+        conn.execute("INSERT INTO blogs_fts (rowid, title, content) SELECT id, title, content FROM blogs")
+    conn.close()
+
+
+def storage(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM")
+    table_bytes = conn.execute("SELECT sum(pgsize) FROM dbstat WHERE name = 'blogs'").fetchone()[0]
+    fts_bytes = conn.execute("SELECT sum(pgsize) FROM dbstat WHERE name LIKE 'blogs_fts%'").fetchone()[0]
+    stored = dict(conn.execute("SELECT typeof(content), count(*) FROM blogs GROUP BY 1").fetchall())
+    conn.close()
+    return {
+        "file_bytes": os.path.getsize(db_path),
+        "blogs_table_bytes": table_bytes,
+        "blogs_fts_bytes": fts_bytes,
+        "rows_by_type": stored,
+    }
+
+
+async def measure(http, paths: list[str], params: dict, headers: dict, gzip: bool) -> dict:
+    headers = {**headers, "Accept-Encoding": "gzip" if gzip else "identity"}
+    latencies: list[float] = []
+    sent = 0
+    with harness.Timer() as total:
+        for path in paths:
+            with harness.Timer() as timer:
+                response = await http.get(path, params=params, headers=headers)
+            response.raise_for_status()
+            latencies.append(timer.elapsed)
+            sent += int(response.headers["content-length"])
+    return {
+        "requests_per_second": round(len(paths) / total.elapsed, 1),
+        "mean_response_bytes": sent // len(paths),
+        **harness.percentiles(latencies),
+    }
+
+
+async def reads(http, headers: dict, blog_ids: list[int], requests: int) -> dict:
+    rng = random.Random(11)
+    one = [f"/blogs/{rng.choice(blog_ids)}" for _ in range(requests)]
+    pages = ["/all/blogs"] * max(requests // 10, 1)
+    results = {}
+    for gzip in (False, True):
+        encoding = "gzip" if gzip else "identity"
+        results[f"GET /blogs/{{id}} {encoding}"] = await measure(http, one, {}, headers, gzip)
+        results[f"GET /all/blogs?view=full {encoding}"] = await measure(
+            http, pages, {"view": "full", "limit": 20}, {}, gzip
+        )
+    return results
+
+
+async def main(blogs: int, median_size: int, threshold: int, requests: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1)
+    posts = make_corpus(blogs, median_size)
+    seed_corpus(db_path, owner_id=1, posts=posts)
+
+    from migrations import blog_content_compression_migration
+
+    report = {"blogs": blogs, "corpus_bytes": sum(len(p.encode("utf-8")) for p in posts), "threshold": threshold}
+    async with harness.client() as http:
+        headers = await harness.login(http, emails[0])
+        blog_ids = list(range(1, blogs + 1))
+
+        report["text"] = {"storage": storage(db_path), "reads": await reads(http, headers, blog_ids, requests)}
+        with harness.Timer() as migration:
+            compressed = await blog_content_compression_migration.upgrade(threshold=threshold)
+        report["migration"] = {"rows_compressed": compressed, "seconds": round(migration.elapsed, 2)}
+        report["compressed"] = {"storage": storage(db_path), "reads": await reads(http, headers, blog_ids, requests)}
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=20_000)
+    parser.add_argument("--median-size", type=int, default=4000)
+    parser.add_argument("--threshold", type=int, default=1024)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.blogs, args.median_size, args.threshold, args.requests)), indent=2))
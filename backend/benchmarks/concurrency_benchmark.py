@@ -0,0 +1,63 @@
+"""Throughput of a mixed read/write workload with many parallel clients.
+
+Every client logs in once and then loops over: create a blog, read it back,
+read its own profile. Handlers that block the event loop serialize all
+clients behind each other, so this is where the async data layer shows.
+
+    cd backend
+    python -m benchmarks.concurrency_benchmark --clients 50 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import harness
+
+
+async def timed(request, latencies: list[float]):
+    start = time.perf_counter()
+    response = await request
+    latencies.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+async def run_client(http, headers: dict, requests: int, latencies: list[float]) -> None:
+    for n in range(requests):
+        created = await timed(
+            http.post("/blogs", json={"title": f"t{n}", "content": "c" * 500}, headers=headers),
+            latencies,
+        )
+        await timed(http.get(f"/blogs/{created.json()['id']}", headers=headers), latencies)
+        await timed(http.get("/users/me", headers=headers), latencies)
+
+
+async def main(clients: int, requests: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=clients)
+
+    async with harness.client() as http:
+        headers = [await harness.login(http, email) for email in emails]
+        latencies: list[float] = []
+        with harness.Timer() as timer:
+            await asyncio.gather(
+                *(run_client(http, h, requests, latencies) for h in headers)
+            )
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "seconds": round(timer.elapsed, 3),
+        "requests_per_second": round(len(latencies) / timer.elapsed, 1),
+        **harness.percentiles(latencies),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.clients, args.requests)), indent=2))
@@ -0,0 +1,150 @@
+"""Peak memory of the NDJSON export as the blog table grows.
+
+httpx's ASGI transport buffers whole bodies, so the app is driven directly
+through ASGI here and every chunk is dropped as soon as it is counted. RSS
+is sampled on every chunk; a streaming export keeps the peak flat however
+many rows there are.
+
+A run fails (exit status 1) when an export does not send every row, when
+its peak RSS exceeds the RSS before it by more than `--tolerance-mb`, or
+when its peak exceeds that of the smallest size by more than the same
+tolerance. Buffering the export would grow by roughly `--content-size`
+bytes per row, about 1 GB at 1M rows. The default sizes include 1M rows,
+which seeds a database of about 1 GB first.
+
+    cd backend
+    python -m benchmarks.export_benchmark --sizes 10000 100000 1000000 --tolerance-mb 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+
+from benchmarks import harness
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def stream_export(app, headers: dict) -> dict:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/1/blogs/export",
+        "raw_path": b"/api/1/blogs/export",
+        "query_string": b"format=ndjson",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    stats = {"status": None, "bytes": 0, "rows": 0, "peak_rss": rss_bytes()}
+
+    request_sent = False
+    finished = asyncio.Event()
+
+    # the request body once, then block until the response is done, like a real server
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            stats["bytes"] += len(body)
+            stats["rows"] += body.count(b"\n")
+            stats["peak_rss"] = max(stats["peak_rss"], rss_bytes())
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return stats
+
+
+async def main(sizes: list[int], content_size: int, tolerance_mb: float) -> tuple[list[dict], bool]:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    harness.seed(db_path, users=1)
+
+    from main import app
+    from auth.create_token import TokenServiceClass
+
+    # the export is admin-only: insert an admin and mint its token directly
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO admins (email, username, hashed_password, is_admin) VALUES ('a@example.org', 'a', 'x', 1)"
+        )
+    conn.close()
+    token = TokenServiceClass.create_access_token({"sub": "a@example.org", "id": 1, "is_admin": True})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = []
+    passed = True
+    seeded = 0
+    baseline_peak = None
+    for size in sorted(sizes):
+        harness.seed_blogs(db_path, owner_id=1, count=size - seeded, content_size=content_size)
+        seeded = size
+        before = rss_bytes()
+        with harness.Timer() as timer:
+            stats = await stream_export(app, headers)
+        # the smallest size sets the baseline the larger ones are held to
+        if baseline_peak is None:
+            baseline_peak = stats["peak_rss"]
+        growth_mb = (stats["peak_rss"] - before) / 2**20
+        over_baseline_mb = (stats["peak_rss"] - baseline_peak) / 2**20
+        ok = (
+            stats["status"] == 200
+            and stats["rows"] == size
+            and growth_mb <= tolerance_mb
+            and over_baseline_mb <= tolerance_mb
+        )
+        passed = passed and ok
+        results.append(
+            {
+                "blogs": size,
+                "status": stats["status"],
+                "rows": stats["rows"],
+                "megabytes_sent": round(stats["bytes"] / 2**20, 1),
+                "seconds": round(timer.elapsed, 2),
+                "rss_before_mb": round(before / 2**20, 1),
+                "peak_rss_mb": round(stats["peak_rss"] / 2**20, 1),
+                "growth_mb": round(growth_mb, 1),
+                "over_smallest_mb": round(over_baseline_mb, 1),
+                "tolerance_mb": tolerance_mb,
+                "ok": ok,
+            }
+        )
+    return results, passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--content-size", type=int, default=1000)
+    parser.add_argument("--tolerance-mb", type=float, default=32)
+    args = parser.parse_args()
+    results, passed = asyncio.run(main(args.sizes, args.content_size, args.tolerance_mb))
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,174 @@
+import os
+import sys
+import tempfile
+import time
+import sqlite3
+import statistics
+from datetime import datetime, timedelta
+
+import bcrypt
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "benchmark-password"
+
+
+# point the app at a throwaway database, must run before `main` is imported
+def setup_environment(db_path: str | None = None) -> str:
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="blogs-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+
+    # signups must not wait on DNS, timings would measure the resolver
+    os.environ["EMAIL_VALIDATION_MODE"] = "offline"
+    return db_path
+
+
+# create the schema with a plain sync engine so seeding does not depend on the app
+def create_schema(db_path: str) -> None:
+    import sqlalchemy as _sql
+    from dependencies.database import Base
+    import models  # noqa: F401  registers every table on Base
+
+    sync_engine = _sql.create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+
+# insert users and blogs straight through sqlite3, far faster than the API
+def seed(
+    db_path: str,
+    users: int = 1,
+    blogs_per_user: int = 0,
+    content_size: int = 200,
+    rounds: int = 4,
+) -> list[str]:
+    hashed = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+    # the app hashes at the same cost, or every first login would rehash the seeded password
+    os.environ.setdefault("BCRYPT_ROUNDS", str(rounds))
+    now = datetime.utcnow().isoformat(sep=" ")
+    emails = [f"bench{i}@example.org" for i in range(users)]
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (email, username, hashed_password, is_admin, date_created) VALUES (?, ?, ?, 0, ?)",
+            [(email, f"bench{i}", hashed, now) for i, email in enumerate(emails)],
+        )
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+    conn.close()
+
+    for user_id in user_ids:
+        seed_blogs(db_path, user_id, blogs_per_user, content_size)
+    return emails
+
+
+def seed_blogs(db_path: str, owner_id: int, count: int, content_size: int = 200) -> None:
+    content = "x" * content_size
+    start = datetime.utcnow()
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO blogs (title, content, created_at, updated_at, owner_id) VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"post {n}", content, stamp, stamp, owner_id)
+                for n in range(count)
+                for stamp in [(start + timedelta(microseconds=n)).isoformat(sep=" ")]
+            ),
+        )
+    conn.close()
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+# `address` is the (host, port) the app sees as request.client
+def client(address: tuple[str, int] = ("127.0.0.1", 123)):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app, client=address)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench/api/1")
+
+
+async def login(http, email: str, path: str = "/users/token") -> dict:
+    response = await http.post(path, data={"username": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+# counts SQL statements sent through the app's engine
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        from dependencies.database import engine, read_engine
+
+        # the production profile reads through a second engine
+        self._engines = {engine.sync_engine, read_engine.sync_engine}
+        for sync_engine in self._engines:
+            event.listen(sync_engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+
+        for sync_engine in self._engines:
+            event.remove(sync_engine, "before_cursor_execute", self._on_execute)
+
+
+# latencies and status codes of one scenario
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    async def request(self, http, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        response = await http.request(method, path, **kwargs)
+        self.latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors += 1
+        return response
+
+    def summary(self, seconds: float, queries: int) -> dict:
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "requests_per_second": round(requests / seconds, 1) if seconds else 0.0,
+            "queries_per_request": round(queries / requests, 2) if requests else 0.0,
+            **percentiles(self.latencies),
+        }
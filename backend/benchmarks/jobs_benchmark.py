@@ -0,0 +1,86 @@
+"""How long heavy requests hold the client when handed to the job runner.
+
+Seeds two users with `--blogs` blogs each, deletes the first inline through
+DELETE /users/me and the second with ?background=true, then polls
+GET /jobs/{job_id} until the job finishes. Also queues an export job and
+downloads its file. httpx's ASGI transport does not run the app lifespan,
+so the benchmark starts the job runner itself.
+
+    cd backend
+    python -m benchmarks.jobs_benchmark --blogs 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import harness
+
+ADMIN_EMAIL = "admin@example.org"
+
+
+async def wait_for_job(http, job_id: int, headers: dict) -> dict:
+    while True:
+        response = await http.get(f"/jobs/{job_id}", headers=headers)
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+
+
+async def main(blogs: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=2, blogs_per_user=blogs)
+
+    from services.job_service import job_runner
+
+    async with harness.client() as http:
+        await job_runner.start()
+        try:
+            headers = [await harness.login(http, email) for email in emails]
+            await http.post(
+                "/admins", json={"email": ADMIN_EMAIL, "username": "admin", "password": harness.BENCH_PASSWORD}
+            )
+            admin_headers = await harness.login(http, ADMIN_EMAIL, path="/admins/token")
+
+            with harness.Timer() as inline:
+                response = await http.delete("/users/me", headers=headers[0])
+            response.raise_for_status()
+
+            with harness.Timer() as export_accepted:
+                response = await http.post("/blogs/export/jobs", headers=admin_headers)
+            response.raise_for_status()
+            with harness.Timer() as export_done:
+                export_job = await wait_for_job(http, response.json()["id"], admin_headers)
+            download = await http.get(f"/jobs/{export_job['id']}/download", headers=admin_headers)
+            download.raise_for_status()
+
+            with harness.Timer() as accepted:
+                response = await http.delete("/users/me", params={"background": "true"}, headers=headers[1])
+            response.raise_for_status()
+            start = time.perf_counter()
+            delete_job = await wait_for_job(http, response.json()["id"], headers[1])
+            finished = time.perf_counter() - start
+        finally:
+            await job_runner.stop()
+
+    return {
+        "blogs_per_user": blogs,
+        "delete_inline_seconds": round(inline.elapsed, 3),
+        "delete_background_response_seconds": round(accepted.elapsed, 3),
+        "delete_background_job_seconds": round(finished, 3),
+        "delete_job_status": delete_job["status"],
+        "export_response_seconds": round(export_accepted.elapsed, 3),
+        "export_job_seconds": round(export_done.elapsed, 3),
+        "export_job": {key: export_job[key] for key in ("status", "progress", "total", "result")},
+        "export_downloaded_lines": len(download.text.splitlines()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.blogs)), indent=2))
@@ -0,0 +1,76 @@
+"""Login latency while the rest of the API is under load.
+
+Background clients poll cheap authenticated endpoints while a fixed number
+of login clients authenticate in a loop with production-cost bcrypt hashes.
+If hashing runs on the event loop, the background p99 jumps to the cost of
+a bcrypt call.
+
+    cd backend
+    python -m benchmarks.login_benchmark --background 20 --logins 4 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import harness
+
+
+async def background_client(http, headers: dict, stop: asyncio.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await http.get("/users/me", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def login_client(http, email: str, stop: asyncio.Event, latencies: list[float], statuses: dict) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await http.post(
+            "/users/token", data={"username": email, "password": harness.BENCH_PASSWORD}
+        )
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+
+
+async def main(background: int, logins: int, seconds: float, rounds: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=max(background, logins), rounds=rounds)
+
+    async with harness.client() as http:
+        headers = [await harness.login(http, email) for email in emails[:background]]
+        stop = asyncio.Event()
+        background_latencies: list[float] = []
+        login_latencies: list[float] = []
+        statuses: dict[int, int] = {}
+
+        tasks = [
+            *(background_client(http, h, stop, background_latencies) for h in headers),
+            *(login_client(http, email, stop, login_latencies, statuses) for email in emails[:logins]),
+        ]
+        runner = asyncio.gather(*tasks)
+        await asyncio.sleep(seconds)
+        stop.set()
+        await runner
+
+    return {
+        "bcrypt_rounds": rounds,
+        "login": {"count": len(login_latencies), "statuses": statuses, **harness.percentiles(login_latencies)},
+        "background": {
+            "requests_per_second": round(len(background_latencies) / seconds, 1),
+            **harness.percentiles(background_latencies),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--background", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.background, args.logins, args.seconds, args.rounds)), indent=2))
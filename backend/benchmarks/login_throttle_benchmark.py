@@ -0,0 +1,102 @@
+"""Legitimate login latency during a simulated credential-stuffing attack.
+
+Legitimate clients, each from its own IP, log in with the right password
+every `--interval` seconds. Attackers, each from its own IP, post wrong
+passwords as fast as they can, mixing accounts that exist (those cost a
+bcrypt verify) with addresses that do not. Three phases are measured:
+no attack, attack with the login throttle on, attack with it off.
+
+    cd backend
+    python -m benchmarks.login_throttle_benchmark --legitimate 8 --attackers 50 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks import harness
+
+
+async def legitimate_client(http, email: str, interval: float, stop: asyncio.Event, latencies: list[float], statuses: dict) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await http.post("/users/token", data={"username": email, "password": harness.BENCH_PASSWORD})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def attacker(http, emails: list[str], seed: int, stop: asyncio.Event, statuses: dict) -> None:
+    rng = random.Random(seed)
+    while not stop.is_set():
+        email = rng.choice(emails) if rng.random() < 0.5 else f"nobody{rng.randrange(10**9)}@example.org"
+        response = await http.post("/users/token", data={"username": email, "password": "guess"})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        # a rejected attacker keeps hammering, but the event loop must get a turn
+        await asyncio.sleep(0)
+
+
+async def phase(legitimate: list[tuple], attackers: list, emails: list[str], interval: float, seconds: float) -> dict:
+    from auth.login_throttle import user_login_throttle
+    from utils.metrics_utils import password_hash
+
+    user_login_throttle.clear()
+    hash_calls = password_hash["calls"]
+    stop = asyncio.Event()
+    latencies: list[float] = []
+    legitimate_statuses: dict[int, int] = {}
+    attack_statuses: dict[int, int] = {}
+
+    runner = asyncio.gather(
+        *(legitimate_client(http, email, interval, stop, latencies, legitimate_statuses) for http, email in legitimate),
+        *(attacker(http, emails, seed, stop, attack_statuses) for seed, http in enumerate(attackers)),
+    )
+    await asyncio.sleep(seconds)
+    stop.set()
+    await runner
+
+    return {
+        "legitimate": {"logins": len(latencies), "statuses": legitimate_statuses, **harness.percentiles(latencies)},
+        "attack": {
+            "attempts_per_second": round(sum(attack_statuses.values()) / seconds, 1),
+            "statuses": attack_statuses,
+        },
+        "bcrypt_calls": password_hash["calls"] - hash_calls,
+        "throttle": user_login_throttle.stats(),
+    }
+
+
+async def main(legitimate: int, attackers: int, seconds: float, interval: float, rounds: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=legitimate, rounds=rounds)
+
+    from auth.login_throttle import user_login_throttle
+
+    legitimate_clients = [harness.client((f"192.168.{n // 256}.{n % 256}", 5000)) for n in range(legitimate)]
+    attack_clients = [harness.client((f"10.0.{n // 256}.{n % 256}", 6000)) for n in range(attackers)]
+    report = {"bcrypt_rounds": rounds, "legitimate_clients": legitimate, "attackers": attackers}
+    try:
+        pairs = list(zip(legitimate_clients, emails))
+        report["no_attack"] = await phase(pairs, [], emails, interval, seconds)
+        report["attack_throttled"] = await phase(pairs, attack_clients, emails, interval, seconds)
+        user_login_throttle.enabled = False
+        report["attack_unthrottled"] = await phase(pairs, attack_clients, emails, interval, seconds)
+    finally:
+        user_login_throttle.enabled = True
+        for http in (*legitimate_clients, *attack_clients):
+            await http.aclose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legitimate", type=int, default=8)
+    parser.add_argument("--attackers", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=2)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.legitimate, args.attackers, args.seconds, args.interval, args.rounds)), indent=2))
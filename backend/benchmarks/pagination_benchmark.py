@@ -0,0 +1,78 @@
+"""Per-page latency of the list endpoints as the blog table grows.
+
+The same database is grown step by step and, at every size, the first
+page, a page from the middle of the table and the last page are timed.
+Keyset pagination should keep all three flat.
+
+    cd backend
+    python -m benchmarks.pagination_benchmark --sizes 1000 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+from benchmarks import harness
+
+
+# the cursor a client would hold after paging through `position` rows
+def cursor_at(db_path: str, position: int) -> str | None:
+    from utils.pagination_utils import encode_cursor
+
+    if position <= 0:
+        return None
+    conn = sqlite3.connect(db_path)
+    row = conn.execute(
+        "SELECT created_at, id FROM blogs ORDER BY created_at, id LIMIT 1 OFFSET ?",
+        (position - 1,),
+    ).fetchone()
+    conn.close()
+    return encode_cursor(datetime.fromisoformat(row[0]), row[1])
+
+
+async def time_page(http, path: str, cursor: str | None, limit: int, headers: dict, repeat: int) -> float:
+    params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await http.get(path, params=params, headers=headers)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return harness.percentiles(samples)["p50_ms"]
+
+
+async def main(sizes: list[int], limit: int, repeat: int) -> list[dict]:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1)
+
+    results = []
+    seeded = 0
+    async with harness.client() as http:
+        headers = await harness.login(http, emails[0])
+        for size in sorted(sizes):
+            harness.seed_blogs(db_path, owner_id=1, count=size - seeded)
+            seeded = size
+
+            result = {"blogs": size}
+            for name, position in (("first", 0), ("middle", size // 2), ("last", size - limit)):
+                cursor = cursor_at(db_path, position)
+                result[f"all_blogs_{name}_p50_ms"] = await time_page(
+                    http, "/all/blogs", cursor, limit, {}, repeat
+                )
+                result[f"my_blogs_{name}_p50_ms"] = await time_page(
+                    http, "/users/me/blogs", cursor, limit, headers, repeat
+                )
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.sizes, args.limit, args.repeat)), indent=2))
@@ -0,0 +1,102 @@
+"""Mixed read/write throughput under the default and production database profiles.
+
+Every client logs in once and then loops over a read-heavy mix: list all
+blogs, read one, read its own blog list, and every fourth iteration create a
+blog. The profile is picked when `dependencies.database` is imported, so each
+one runs in its own subprocess against its own freshly seeded database.
+
+    cd backend
+    python -m benchmarks.profile_benchmark --clients 50 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import harness
+
+PROFILES = ("default", "production")
+
+
+async def timed(request, latencies: list[float]):
+    start = time.perf_counter()
+    response = await request
+    latencies.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+async def run_client(http, headers: dict, requests: int, latencies: list[float]) -> None:
+    listing = await timed(http.get("/users/me/blogs", headers=headers), latencies)
+    blog_id = listing.json()["items"][0]["id"]
+    for n in range(requests):
+        await timed(http.get("/all/blogs", headers=headers), latencies)
+        await timed(http.get(f"/blogs/{blog_id}", headers=headers), latencies)
+        await timed(http.get("/users/me/blogs", headers=headers), latencies)
+        if n % 4 == 0:
+            await timed(
+                http.post("/blogs", json={"title": f"t{n}", "content": "c" * 500}, headers=headers),
+                latencies,
+            )
+
+
+async def run_profile(clients: int, requests: int, blogs_per_user: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=clients, blogs_per_user=blogs_per_user)
+
+    async with harness.client() as http:
+        headers = [await harness.login(http, email) for email in emails]
+        latencies: list[float] = []
+        with harness.Timer() as timer:
+            await asyncio.gather(
+                *(run_client(http, h, requests, latencies) for h in headers)
+            )
+
+    return {
+        "profile": os.environ.get("DATABASE_PROFILE", "default"),
+        "clients": clients,
+        "requests": len(latencies),
+        "seconds": round(timer.elapsed, 3),
+        "requests_per_second": round(len(latencies) / timer.elapsed, 1),
+        **harness.percentiles(latencies),
+    }
+
+
+# one subprocess per profile, the engines are configured at import time
+def compare(clients: int, requests: int, blogs_per_user: int) -> list[dict]:
+    results = []
+    for profile in PROFILES:
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.profile_benchmark",
+                "--profile", profile,
+                "--clients", str(clients),
+                "--requests", str(requests),
+                "--blogs-per-user", str(blogs_per_user),
+            ],
+            cwd=harness.BACKEND_DIR,
+            env={**os.environ, "DATABASE_PROFILE": profile},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--blogs-per-user", type=int, default=200)
+    parser.add_argument("--profile", choices=PROFILES, help="run a single profile in this process")
+    args = parser.parse_args()
+    if args.profile:
+        os.environ["DATABASE_PROFILE"] = args.profile
+        print(json.dumps(asyncio.run(run_profile(args.clients, args.requests, args.blogs_per_user))))
+    else:
+        print(json.dumps(compare(args.clients, args.requests, args.blogs_per_user), indent=2))
@@ -0,0 +1,72 @@
+"""Hit rate and latency of GET /public/blogs/{id} and its hot-post cache.
+
+Readers pick posts from a Zipf distribution (a few posts get most reads)
+and fetch them through the public endpoint and, for comparison, through
+the owner's GET /blogs/{id}. A final burst of concurrent requests for one
+uncached post shows the misses collapsing into a single database load.
+
+    cd backend
+    python -m benchmarks.public_blog_benchmark --blogs 5000 --requests 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from benchmarks import harness
+
+
+def zipf_ids(count: int, blogs: int, seed: int = 5) -> list[int]:
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, blogs + 1)]
+    return rng.choices(range(1, blogs + 1), weights, k=count)
+
+
+async def run(http, paths: list[str], headers: dict, concurrency: int) -> dict:
+    recorder = harness.Recorder()
+    queue = iter(paths)
+
+    async def worker() -> None:
+        for path in queue:
+            await recorder.request(http, "GET", path, headers=headers)
+
+    with harness.Timer() as timer:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return recorder.summary(timer.elapsed, queries=0)
+
+
+async def main(blogs: int, requests: int, concurrency: int, content_size: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1, blogs_per_user=blogs, content_size=content_size)
+
+    from services.public_blog_service import public_blog_cache
+
+    ids = zipf_ids(requests, blogs)
+    report = {"blogs": blogs, "requests": requests, "concurrency": concurrency}
+    async with harness.client() as http:
+        headers = await harness.login(http, emails[0])
+
+        report["owner_get"] = await run(http, [f"/blogs/{i}" for i in ids], headers, concurrency)
+        report["public_get"] = await run(http, [f"/public/blogs/{i}" for i in ids], {}, concurrency)
+        report["public_get"]["cache"] = public_blog_cache.stats()
+
+        public_blog_cache.clear()
+        collapsed_before, misses_before = public_blog_cache.collapsed, public_blog_cache.misses
+        with harness.QueryCounter() as queries:
+            burst = await run(http, ["/public/blogs/1"] * concurrency, {}, concurrency)
+        burst["misses"] = public_blog_cache.misses - misses_before
+        burst["collapsed"] = public_blog_cache.collapsed - collapsed_before
+        burst["queries"] = queries.count
+        report["cold_burst"] = burst
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--content-size", type=int, default=4000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.blogs, args.requests, args.concurrency, args.content_size)), indent=2))
@@ -0,0 +1,92 @@
+"""SQL statements per request on the signup and profile-update write paths.
+
+Each case sends one request and counts the statements the app sends to the
+database while it runs, including the failing inserts and updates that map
+a unique-constraint violation to a 400. The principal cache is warmed
+before every authenticated request so only the write itself is counted.
+Exits with status 1 when a case goes over its statement budget or answers
+with an unexpected status or detail, so it can guard the lower counts.
+
+    cd backend
+    python -m benchmarks.query_count_benchmark
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks import harness
+
+# (name, method, path, body, auth, expected status, expected detail, statement budget)
+CASES = (
+    ("signup", "POST", "/users",
+     {"email": "new@example.org", "username": "new", "password": harness.BENCH_PASSWORD},
+     None, 201, None, 1),
+    ("signup taken email", "POST", "/users",
+     {"email": "new@example.org", "username": "other", "password": harness.BENCH_PASSWORD},
+     None, 400, "Email already registered", 1),
+    ("signup taken username", "POST", "/users",
+     {"email": "other@example.org", "username": "new", "password": harness.BENCH_PASSWORD},
+     None, 400, "Username already taken", 1),
+    ("update user", "PUT", "/users/me", {"username": "renamed"}, "user", 200, None, 1),
+    ("update user taken username", "PUT", "/users/me", {"username": "new"}, "user", 400, "Username already taken", 1),
+    ("update user taken email", "PUT", "/users/me", {"email": "new@example.org"}, "user", 400, "Email already registered", 1),
+    ("admin signup", "POST", "/admins",
+     {"email": "other-admin@example.org", "username": "other-admin", "password": harness.BENCH_PASSWORD},
+     None, 201, None, 1),
+    ("admin signup taken email", "POST", "/admins",
+     {"email": "admin@example.org", "username": "someone", "password": harness.BENCH_PASSWORD},
+     None, 400, "Admin already registered", 1),
+    ("update admin", "PUT", "/admins/me", {"username": "renamed-admin"}, "admin", 200, None, 1),
+    ("update admin taken email", "PUT", "/admins/me", {"email": "other-admin@example.org"}, "admin", 400, "Email already registered", 1),
+)
+
+
+async def main() -> tuple[list[dict], bool]:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1)
+
+    async with harness.client() as http:
+        response = await http.post(
+            "/admins",
+            json={"email": "admin@example.org", "username": "admin", "password": harness.BENCH_PASSWORD},
+        )
+        response.raise_for_status()
+        headers = {
+            "user": await harness.login(http, emails[0]),
+            "admin": await harness.login(http, "admin@example.org", path="/admins/token"),
+        }
+        me = {"user": "/users/me", "admin": "/admins/me"}
+
+        results, passed = [], True
+        for name, method, path, body, auth, expected_status, expected_detail, budget in CASES:
+            if auth:
+                # writes invalidate the cached principal, load it again outside the count
+                await http.get(me[auth], headers=headers[auth])
+            with harness.QueryCounter() as counter:
+                response = await http.request(method, path, json=body, headers=headers.get(auth))
+            detail = response.json().get("detail") if response.status_code >= 400 else None
+            ok = (
+                counter.count <= budget
+                and response.status_code == expected_status
+                and detail == expected_detail
+            )
+            passed = passed and ok
+            results.append({
+                "case": name,
+                "status": response.status_code,
+                "detail": detail,
+                "statements": counter.count,
+                "budget": budget,
+                "ok": ok,
+            })
+    return results, passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+    results, passed = asyncio.run(main())
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,87 @@
+"""Full-text search latency over a generated corpus.
+
+Posts are built from a Zipf-like vocabulary so there are both very common
+and rare terms. The FTS table is filled through the real migration, which
+also reports the backfill time.
+
+    cd backend
+    python -m benchmarks.search_benchmark --blogs 1000000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import harness
+
+VOCABULARY = [f"word{n}" for n in range(20_000)]
+# word0 is the most frequent term, the tail is rare
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def seed_corpus(db_path: str, blogs: int, words_per_post: int, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    start = datetime.utcnow()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for offset in range(0, blogs, 10_000):
+            batch = []
+            for n in range(offset, min(blogs, offset + 10_000)):
+                words = rng.choices(VOCABULARY, WEIGHTS, k=words_per_post)
+                stamp = (start + timedelta(microseconds=n)).isoformat(sep=" ")
+                batch.append((" ".join(words[:6]), " ".join(words), stamp, stamp, 1))
+            conn.executemany(
+                "INSERT INTO blogs (title, content, created_at, updated_at, owner_id) VALUES (?, ?, ?, ?, ?)",
+                batch,
+            )
+    conn.close()
+
+
+async def time_query(http, params: dict, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await http.get("/blogs/search", params=params)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return {"next_cursor": response.json()["next_cursor"], **harness.percentiles(samples)}
+
+
+async def main(blogs: int, words_per_post: int, repeat: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    harness.seed(db_path, users=1)
+    seed_corpus(db_path, blogs, words_per_post)
+
+    from migrations import blogs_fts_migration
+
+    with harness.Timer() as backfill:
+        await blogs_fts_migration.upgrade()
+
+    results = {"blogs": blogs, "backfill_seconds": round(backfill.elapsed, 1), "queries": {}}
+    async with harness.client() as http:
+        for name, q in (
+            ("common_term", "word0"),
+            ("mid_term", "word50"),
+            ("rare_term", "word19999"),
+            ("two_terms", "word1 word2"),
+        ):
+            first = await time_query(http, {"q": q}, repeat)
+            result = {"first_page": {k: v for k, v in first.items() if k != "next_cursor"}}
+            if first["next_cursor"]:
+                second = await time_query(http, {"q": q, "cursor": first["next_cursor"]}, repeat)
+                result["second_page"] = {k: v for k, v in second.items() if k != "next_cursor"}
+            results["queries"][name] = result
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.blogs, args.words, args.repeat)), indent=2))
@@ -0,0 +1,88 @@
+"""Cost of turning ORM rows into a JSON response body, per page size.
+
+Compares the path the routers used to take (a schema instance per row, then
+FastAPI validating the dumped page against response_model again and
+json.dumps through JSONResponse) with utils.serialization_utils,
+which validates the rows once through a cached TypeAdapter and encodes them
+in pydantic-core. Rows are transient ORM objects, no database is involved.
+
+    cd backend
+    python -m benchmarks.serialization_benchmark --items 1 100 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from benchmarks import harness
+
+
+def make_blogs(count: int, content_size: int) -> list:
+    from models.blogs_models import Blog
+
+    now = datetime.utcnow()
+    return [
+        Blog(id=i, title=f"post {i}", content="x" * content_size, owner_id=1, created_at=now, updated_at=now)
+        for i in range(count)
+    ]
+
+
+async def old_path(field, blogs: list) -> bytes:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from schemas.blogs_schema import Blog
+    from schemas.pagination_schema import Page
+
+    page = Page(items=[Blog.model_validate(blog) for blog in blogs], next_cursor=None)
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def new_path(shape, blogs: list) -> bytes:
+    from schemas.pagination_schema import Page
+    from utils.serialization_utils import json_response
+
+    return json_response(shape, Page(items=blogs, next_cursor=None)).body
+
+
+async def measure(encode, arg, blogs: list, seconds: float) -> dict:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline or len(latencies) < 5:
+        with harness.Timer() as timer:
+            await encode(arg, blogs)
+        latencies.append(timer.elapsed)
+    return {"runs": len(latencies), **harness.percentiles(latencies)}
+
+
+async def main(sizes: list[int], content_size: int, seconds: float) -> dict:
+    harness.setup_environment()
+    from fastapi.utils import create_model_field
+    from schemas.blogs_schema import Blog
+    from schemas.pagination_schema import Page
+
+    shape = Page[Blog]
+    field = create_model_field(name="Response", type_=shape, mode="serialization")
+
+    results = {}
+    for size in sizes:
+        blogs = make_blogs(size, content_size)
+        old_body, new_body = await old_path(field, blogs), await new_path(shape, blogs)
+        # the fast path must answer the same document
+        assert json.loads(old_body) == json.loads(new_body)
+        results[f"{size} items"] = {
+            "bytes": len(new_body),
+            "old": await measure(old_path, field, blogs, seconds),
+            "new": await measure(new_path, shape, blogs, seconds),
+        }
+    return {"content_bytes": content_size, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--content-size", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.items, args.content_size, args.seconds)), indent=2))
@@ -0,0 +1,148 @@
+"""End-to-end benchmark suite for the API.
+
+Drives `main.app` in-process through httpx's ASGI transport against a
+seeded throwaway SQLite database and writes one JSON document with
+p50/p95/p99 latency, requests/s and SQL statements per request for each
+scenario. Two documents can be diffed with `benchmarks.compare`.
+
+    cd backend
+    python -m benchmarks.suite --users 100 --blogs-per-user 100 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+from benchmarks import harness
+
+
+async def scenario_signup(http, ctx: dict, iterations: int, recorder: harness.Recorder) -> None:
+    for n in range(iterations):
+        await recorder.request(
+            http, "POST", "/users",
+            json={"email": f"signup{n}@example.org", "username": f"signup{n}", "password": harness.BENCH_PASSWORD},
+        )
+
+
+async def scenario_login(http, ctx: dict, iterations: int, recorder: harness.Recorder) -> None:
+    emails = ctx["emails"]
+    for n in range(iterations):
+        await recorder.request(
+            http, "POST", "/users/token",
+            data={"username": emails[n % len(emails)], "password": harness.BENCH_PASSWORD},
+        )
+
+
+async def scenario_blog_crud(http, ctx: dict, iterations: int, recorder: harness.Recorder) -> None:
+    headers = ctx["headers"][0]
+    for n in range(iterations):
+        created = await recorder.request(
+            http, "POST", "/blogs", json={"title": f"crud {n}", "content": "c" * 1000}, headers=headers
+        )
+        blog_id = created.json()["id"]
+        await recorder.request(http, "GET", f"/blogs/{blog_id}", headers=headers)
+        await recorder.request(
+            http, "PUT", f"/blogs/{blog_id}", json={"title": f"crud {n}", "content": "u" * 1000}, headers=headers
+        )
+        await recorder.request(http, "DELETE", f"/blogs/{blog_id}", headers=headers)
+
+
+async def scenario_lists(http, ctx: dict, iterations: int, recorder: harness.Recorder) -> None:
+    headers = ctx["headers"][0]
+    for _ in range(iterations):
+        cursor = None
+        # first pages plus a few cursor follow-ups, like a client scrolling
+        for _ in range(3):
+            params = {"cursor": cursor} if cursor else {}
+            response = await recorder.request(http, "GET", "/all/blogs", params=params)
+            cursor = response.json().get("next_cursor")
+            if not cursor:
+                break
+        await recorder.request(http, "GET", "/users/me/blogs", headers=headers)
+        await recorder.request(http, "GET", "/users")
+
+
+async def mixed_client(http, headers: dict, iterations: int, recorder: harness.Recorder) -> None:
+    for n in range(iterations):
+        created = await recorder.request(
+            http, "POST", "/blogs", json={"title": f"mixed {n}", "content": "m" * 1000}, headers=headers
+        )
+        await recorder.request(http, "GET", f"/blogs/{created.json()['id']}", headers=headers)
+        await recorder.request(http, "GET", "/all/blogs")
+        await recorder.request(http, "GET", "/users/me", headers=headers)
+
+
+async def scenario_mixed_concurrent(http, ctx: dict, iterations: int, recorder: harness.Recorder) -> None:
+    await asyncio.gather(*(mixed_client(http, h, iterations, recorder) for h in ctx["headers"]))
+
+
+SCENARIOS = {
+    "signup": scenario_signup,
+    "login": scenario_login,
+    "blog_crud": scenario_blog_crud,
+    "lists": scenario_lists,
+    "mixed_concurrent": scenario_mixed_concurrent,
+}
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=args.users, blogs_per_user=args.blogs_per_user, rounds=args.rounds)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "users": args.users,
+            "blogs_per_user": args.blogs_per_user,
+            "bcrypt_rounds": args.rounds,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": {},
+    }
+
+    async with harness.client() as http:
+        ctx = {
+            "emails": emails,
+            "headers": [await harness.login(http, email) for email in emails[: args.concurrency]],
+        }
+        for name in args.scenarios:
+            recorder = harness.Recorder()
+            with harness.QueryCounter() as queries, harness.Timer() as timer:
+                await SCENARIOS[name](http, ctx, args.iterations, recorder)
+            report["scenarios"][name] = recorder.summary(timer.elapsed, queries.count)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--blogs-per-user", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt cost of the seeded password hashes")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    args.concurrency = min(args.concurrency, args.users)
+
+    report = json.dumps(asyncio.run(main(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
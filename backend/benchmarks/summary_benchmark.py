@@ -0,0 +1,78 @@
+"""Payload size and latency of blog list pages, summary view against ?view=full.
+
+For each post size, seeds `--blogs` posts and requests list pages of both
+views of GET /all/blogs and GET /users/me/blogs, reporting the response
+body size and p50/p95/p99 latency. The app binds its database at import,
+so every size runs in its own subprocess.
+
+    cd backend
+    python -m benchmarks.summary_benchmark --blogs 2000 --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+
+from benchmarks import harness
+
+
+async def measure(http, path: str, headers: dict, view: str, limit: int, requests: int) -> dict:
+    latencies: list[float] = []
+    size = 0
+    for _ in range(requests):
+        with harness.Timer() as timer:
+            response = await http.get(path, params={"view": view, "limit": limit}, headers=headers)
+        response.raise_for_status()
+        latencies.append(timer.elapsed)
+        size = len(response.content)
+    return {"bytes": size, **harness.percentiles(latencies)}
+
+
+async def run_size(content_size: int, blogs: int, limit: int, requests: int) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1, blogs_per_user=blogs, content_size=content_size)
+
+    results = {}
+    async with harness.client() as http:
+        headers = await harness.login(http, emails[0])
+        for path in ("/all/blogs", "/users/me/blogs"):
+            for view in ("summary", "full"):
+                results[f"{path} view={view}"] = await measure(http, path, headers, view, limit, requests)
+    return {"content_bytes": content_size, "page_size": limit, "results": results}
+
+
+def main(blogs: int, sizes: list[int], limit: int, requests: int) -> list[dict]:
+    results = []
+    for size in sizes:
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.summary_benchmark",
+                "--blogs", str(blogs),
+                "--sizes", str(size),
+                "--limit", str(limit),
+                "--requests", str(requests),
+                "--single",
+            ],
+            cwd=harness.BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--single", action="store_true", help="run the first size in this process")
+    args = parser.parse_args()
+    if args.single:
+        print(json.dumps(asyncio.run(run_size(args.sizes[0], args.blogs, args.limit, args.requests))))
+    else:
+        print(json.dumps(main(args.blogs, args.sizes, args.limit, args.requests), indent=2))
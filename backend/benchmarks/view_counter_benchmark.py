@@ -0,0 +1,90 @@
+"""GET /blogs/{id} throughput with view counting.
+
+Concurrent readers fetch random posts of their owner for `--seconds` in
+three phases:
+
+- off: views are not recorded at all, the baseline,
+- write-behind: the shipped setup, views summed in memory and flushed every
+  VIEW_COUNTER_FLUSH_SECONDS or VIEW_COUNTER_MAX_PENDING blogs,
+- flush every view: max_pending=1, so a write transaction starts as soon
+  as any view is pending, close to incrementing the column on every read.
+
+Flush counts and stored views in the report are cumulative over the phases.
+
+    cd backend
+    python -m benchmarks.view_counter_benchmark --readers 20 --blogs 1000 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import time
+
+from benchmarks import harness
+
+
+async def reader(http, headers: dict, blog_ids: list[int], seed: int, stop: asyncio.Event, latencies: list[float]) -> None:
+    rng = random.Random(seed)
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await http.get(f"/blogs/{rng.choice(blog_ids)}", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def phase(http, headers: dict, blog_ids: list[int], readers: int, seconds: float) -> dict:
+    stop = asyncio.Event()
+    latencies: list[float] = []
+    runner = asyncio.gather(*(reader(http, headers, blog_ids, seed, stop, latencies) for seed in range(readers)))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await runner
+    return {"requests_per_second": round(len(latencies) / seconds, 1), **harness.percentiles(latencies)}
+
+
+def stored_views(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    total = conn.execute("SELECT coalesce(sum(view_count), 0) FROM blogs").fetchone()[0]
+    conn.close()
+    return total
+
+
+async def main(readers: int, blogs: int, seconds: float) -> dict:
+    db_path = harness.setup_environment()
+    harness.create_schema(db_path)
+    emails = harness.seed(db_path, users=1, blogs_per_user=blogs)
+    blog_ids = list(range(1, blogs + 1))
+
+    from services.view_counter import view_counter
+
+    report = {"readers": readers, "blogs": blogs}
+    async with harness.client() as http:
+        headers = await harness.login(http, emails[0])
+
+        # ASGITransport does not run the lifespan, drive the flusher here
+        record, view_counter.record = view_counter.record, lambda blog_id: None
+        report["off"] = await phase(http, headers, blog_ids, readers, seconds)
+        view_counter.record = record
+
+        await view_counter.start()
+        report["write_behind"] = await phase(http, headers, blog_ids, readers, seconds)
+        await view_counter.stop()
+        report["write_behind"].update(view_counter.stats(), stored_views=stored_views(db_path))
+
+        max_pending, view_counter.max_pending = view_counter.max_pending, 1
+        await view_counter.start()
+        report["flush_every_view"] = await phase(http, headers, blog_ids, readers, seconds)
+        await view_counter.stop()
+        view_counter.max_pending = max_pending
+        report["flush_every_view"].update(view_counter.stats(), stored_views=stored_views(db_path))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--blogs", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.readers, args.blogs, args.seconds)), indent=2))
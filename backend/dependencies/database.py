@@ -1,12 +1,95 @@
+import os
+
 import sqlalchemy as _sql
+import sqlalchemy.ext.asyncio as _asyncio
 import sqlalchemy.ext.declarative as _declarative
-import sqlalchemy.orm as _orm
+from dotenv import load_dotenv
 
-DATABASE_URL = "sqlite:///./dependencies/database.db"
+from utils.metrics_utils import instrument_engine
 
-engine = _sql.create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+load_dotenv()
 
-SessionLocal = _orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./dependencies/database.db")
 
-Base = _declarative.declarative_base()
+# a plain sqlite:// url (as in older .env files) has no async driver, use aiosqlite for it
+if DATABASE_URL.startswith("sqlite://"):
+    DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+# "default" keeps SQLite's stock settings and one shared pool. "production" turns on
+# WAL and the pragmas below, sends every write through a single writer connection
+# and serves reads from a separate query_only pool
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "default")
+if DATABASE_PROFILE not in ("default", "production"):
+    raise RuntimeError(f"Unknown DATABASE_PROFILE: {DATABASE_PROFILE}")
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+# SQLite ships with foreign keys off, without this blogs.owner_id's ON DELETE CASCADE is ignored
+FOREIGN_KEY_PRAGMAS = ("PRAGMA foreign_keys=ON",)
+
+PRODUCTION_PRAGMAS = FOREIGN_KEY_PRAGMAS + (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    # negative cache_size is in KiB rather than pages
+    f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _set_pragmas(engine: _asyncio.AsyncEngine, pragmas: tuple[str, ...]) -> None:
+    @_sql.event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
 
+
+# concurrent sessions overlap, give a writer time to wait for the lock instead of failing
+connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+
+if DATABASE_PROFILE == "production":
+    # aiosqlite defaults to NullPool for files, the production pools are sized explicitly.
+    # one writer connection, so writers queue in the pool instead of fighting over SQLite's lock
+    engine = _asyncio.create_async_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        poolclass=_sql.pool.AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    read_engine = _asyncio.create_async_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        poolclass=_sql.pool.AsyncAdaptedQueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+    )
+    _set_pragmas(engine, PRODUCTION_PRAGMAS)
+    # the writer switches the file to WAL, a query_only connection may not change the journal mode
+    read_pragmas = tuple(p for p in PRODUCTION_PRAGMAS if not p.startswith("PRAGMA journal_mode"))
+    _set_pragmas(read_engine, read_pragmas + ("PRAGMA query_only=ON",))
+else:
+    engine = _asyncio.create_async_engine(DATABASE_URL, connect_args=connect_args)
+    read_engine = engine
+    _set_pragmas(engine, FOREIGN_KEY_PRAGMAS)
+
+# per-request SQL statement count and time for Server-Timing and /metrics
+instrument_engine(engine.sync_engine)
+if read_engine is not engine:
+    instrument_engine(read_engine.sync_engine)
+
+SessionLocal = _asyncio.async_sessionmaker(
+    bind=engine, autoflush=False, expire_on_commit=False
+)
+
+ReadSessionLocal = _asyncio.async_sessionmaker(
+    bind=read_engine, autoflush=False, expire_on_commit=False
+)
+
+Base = _declarative.declarative_base()
@@ -1,17 +1,47 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 
-from routers import user_router,  admin_router, blog_router, token_router 
+from routers import user_router,  admin_router, blog_router, token_router, job_router, public_router
 
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
+from utils.metrics_utils import MetricsMiddleware, render_prometheus
+from auth.principal_cache import user_principal_cache, admin_principal_cache
+from services.job_service import job_runner
+from services.view_counter import view_counter
+from services.public_blog_service import public_blog_cache
+
 version = "1"
 
+# responses at least this large are gzipped for clients sending Accept-Encoding: gzip
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+
+# background job workers and the view counter flusher live as long as the app,
+# the counter writes its pending views on the way down
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  await job_runner.start()
+  await view_counter.start()
+  yield
+  await view_counter.stop()
+  await job_runner.stop()
+
 app = FastAPI(
   title="Blog API",
   version="1.0.0",
-  description="API for blog"
+  description="API for blog",
+  lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+# added last so it wraps everything, the metrics see the uncompressed response
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
 app.include_router(user_router.router, tags=["Users"], prefix=f"/api/{version}")
 
 app.include_router(admin_router.router, tags=["Admins"], prefix=f"/api/{version}")
@@ -20,8 +50,26 @@ app.include_router(blog_router.router, tags=["Blogs"], prefix=f"/api/{version}")
 
 app.include_router(token_router.router, tags=["Token"], prefix=f"/api/{version}")
 
+app.include_router(job_router.router, tags=["Jobs"], prefix=f"/api/{version}")
+
+app.include_router(public_router.router, tags=["Public"], prefix=f"/api/{version}")
+
 @app.get("/", tags=["Root"])
 async def read_root():
   return {"message": "go to the /docs"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+  return PlainTextResponse(
+    render_prometheus(
+      {
+        "user_principals": user_principal_cache,
+        "admin_principals": admin_principal_cache,
+        "public_blogs": public_blog_cache,
+      }
+    ),
+    media_type="text/plain; version=0.0.4",
+  )
+
 # uvicorn main:app --reload
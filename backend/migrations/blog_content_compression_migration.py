@@ -0,0 +1,63 @@
+# compresses blogs.content rows written before BLOG_COMPRESSION_THRESHOLD was
+# set, in batches. downgrade() stores every body as text again, e.g. before
+# turning compression off. safe to run more than once
+from sqlalchemy import text
+
+from dependencies.database import engine
+from utils.compression_utils import BLOG_COMPRESSION_THRESHOLD, compress_text, decompress_text
+
+BATCH_SIZE = 500
+# used when the migration runs while compression is still off in the environment
+DEFAULT_THRESHOLD = 1024
+
+
+async def _rewrite(select_sql: str, convert, batch_size: int) -> int:
+    rewritten = 0
+    last_id = 0
+    while True:
+        # one short transaction per batch so writers are not locked out for the whole run
+        async with engine.begin() as conn:
+            rows = (
+                await conn.execute(text(select_sql), {"last_id": last_id, "batch": batch_size})
+            ).all()
+            if not rows:
+                return rewritten
+
+            changed = []
+            for row in rows:
+                content = convert(row.content)
+                if content is not row.content:
+                    changed.append({"id": row.id, "content": content})
+            # plain SQL, an ORM update would also bump updated_at
+            if changed:
+                await conn.execute(text("UPDATE blogs SET content = :content WHERE id = :id"), changed)
+        rewritten += len(changed)
+        last_id = rows[-1].id
+
+
+async def upgrade(threshold: int | None = None, batch_size: int = BATCH_SIZE) -> int:
+    threshold = threshold or BLOG_COMPRESSION_THRESHOLD or DEFAULT_THRESHOLD
+    return await _rewrite(
+        "SELECT id, content FROM blogs "
+        "WHERE id > :last_id AND typeof(content) = 'text' ORDER BY id LIMIT :batch",
+        lambda content: compress_text(content, threshold),
+        batch_size,
+    )
+
+
+async def downgrade(batch_size: int = BATCH_SIZE) -> int:
+    return await _rewrite(
+        "SELECT id, content FROM blogs "
+        "WHERE id > :last_id AND typeof(content) = 'blob' ORDER BY id LIMIT :batch",
+        decompress_text,
+        batch_size,
+    )
+
+# in terminal add:
+#  cd backend
+#  python
+#  import asyncio
+#  from migrations import blog_content_compression_migration
+#  asyncio.run(blog_content_compression_migration.upgrade())
+# the file only shrinks once SQLite rebuilds it, run VACUUM afterwards:
+#  sqlite3 dependencies/database.db "VACUUM"
@@ -0,0 +1,80 @@
+# adds blogs.content_html and blogs.content_html_version, then renders every
+# row whose rendering is missing or not of RENDERER_VERSION, in batches.
+# markdown rendering is pure Python and holds the GIL, so batches are rendered
+# by a process pool. after a renderer upgrade only the stale rows are redone.
+# safe to run more than once
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import text
+
+from dependencies.database import engine
+from utils.compression_utils import compress_text, decompress_text
+from utils.markdown_utils import RENDERER_VERSION, render_markdown
+
+BATCH_SIZE = 500
+
+
+async def add_columns() -> None:
+    async with engine.begin() as conn:
+        columns = (await conn.execute(text("SELECT name FROM pragma_table_info('blogs')"))).scalars().all()
+        if "content_html" not in columns:
+            await conn.execute(text("ALTER TABLE blogs ADD COLUMN content_html VARCHAR"))
+        if "content_html_version" not in columns:
+            await conn.execute(text("ALTER TABLE blogs ADD COLUMN content_html_version INTEGER"))
+
+
+async def upgrade(batch_size: int = BATCH_SIZE, workers: int | None = None) -> int:
+    await add_columns()
+
+    rendered = 0
+    last_id = 0
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # read outside the write transaction, rendering a batch can take a while
+            async with engine.connect() as conn:
+                rows = (
+                    await conn.execute(
+                        text(
+                            "SELECT id, content, updated_at FROM blogs WHERE id > :last_id "
+                            "AND content_html_version IS NOT :version "
+                            "ORDER BY id LIMIT :batch"
+                        ),
+                        {"last_id": last_id, "version": RENDERER_VERSION, "batch": batch_size},
+                    )
+                ).all()
+            if not rows:
+                return rendered
+
+            html = await asyncio.gather(
+                *(loop.run_in_executor(pool, render_markdown, decompress_text(row.content)) for row in rows)
+            )
+
+            # plain SQL, an ORM update would bump updated_at. a row edited since it
+            # was read already got a current rendering from update_blog, skip it
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "UPDATE blogs SET content_html = :html, content_html_version = :version "
+                        "WHERE id = :id AND updated_at IS :updated_at"
+                    ),
+                    [
+                        {
+                            "id": row.id,
+                            "html": compress_text(row_html),
+                            "version": RENDERER_VERSION,
+                            "updated_at": row.updated_at,
+                        }
+                        for row, row_html in zip(rows, html)
+                    ],
+                )
+            rendered += len(rows)
+            last_id = rows[-1].id
+
+# in terminal add:
+#  cd backend
+#  python
+#  import asyncio
+#  from migrations import blog_content_html_migration
+#  asyncio.run(blog_content_html_migration.upgrade())
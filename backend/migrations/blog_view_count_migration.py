@@ -0,0 +1,23 @@
+# adds blogs.view_count and its index to a database created before view
+# counting. existing blogs start at 0. safe to run more than once
+from sqlalchemy import text
+
+from dependencies.database import engine
+
+
+async def upgrade() -> None:
+    async with engine.begin() as conn:
+        columns = (await conn.execute(text("SELECT name FROM pragma_table_info('blogs')"))).scalars().all()
+        if "view_count" not in columns:
+            # a constant default, so SQLite only rewrites the schema and not every row
+            await conn.execute(text("ALTER TABLE blogs ADD COLUMN view_count INTEGER NOT NULL DEFAULT 0"))
+        await conn.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_blogs_view_count_id ON blogs (view_count, id)")
+        )
+
+# in terminal add:
+#  cd backend
+#  python
+#  import asyncio
+#  from migrations import blog_view_count_migration
+#  asyncio.run(blog_view_count_migration.upgrade())
@@ -0,0 +1,65 @@
+# moves blog search from the B-tree index on blogs.content to the blogs_fts
+# FTS5 table: drops the index, creates the table and backfills it in batches.
+# a blogs_fts created before it became contentless holds its own copy of every
+# body, it is dropped and rebuilt. safe to run more than once
+from sqlalchemy import text
+
+from dependencies.database import engine
+from models.blogs_models import BLOGS_FTS_DDL
+from utils.compression_utils import decompress_text
+
+BATCH_SIZE = 10_000
+
+
+async def upgrade(batch_size: int = BATCH_SIZE) -> int:
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX IF EXISTS ix_blogs_content"))
+        existing = await conn.scalar(text("SELECT sql FROM sqlite_master WHERE name = 'blogs_fts'"))
+        if existing is not None and "content=''" not in existing:
+            await conn.execute(text("DROP TABLE blogs_fts"))
+        await conn.execute(BLOGS_FTS_DDL)
+
+    indexed = 0
+    last_id = 0
+    while True:
+        # one short transaction per batch so writers are not locked out for the whole backfill
+        async with engine.begin() as conn:
+            ids = (
+                await conn.execute(
+                    text("SELECT id FROM blogs WHERE id > :last_id ORDER BY id LIMIT :batch"),
+                    {"last_id": last_id, "batch": batch_size},
+                )
+            ).scalars().all()
+            if not ids:
+                return indexed
+
+            # read back through Python, compressed bodies must be indexed as text
+            rows = (
+                await conn.execute(
+                    text(
+                        "SELECT id, title, content FROM blogs "
+                        "WHERE id > :last_id AND id <= :max_id "
+                        "AND id NOT IN (SELECT rowid FROM blogs_fts WHERE rowid > :last_id AND rowid <= :max_id)"
+                    ),
+                    {"last_id": last_id, "max_id": ids[-1]},
+                )
+            ).all()
+            if rows:
+                await conn.execute(
+                    text("INSERT INTO blogs_fts (rowid, title, content) VALUES (:id, :title, :content)"),
+                    [
+                        {"id": row.id, "title": row.title or "", "content": decompress_text(row.content) or ""}
+                        for row in rows
+                    ],
+                )
+        indexed += len(ids)
+        last_id = ids[-1]
+
+# in terminal add:
+#  cd backend
+#  python
+#  import asyncio
+#  from migrations import blogs_fts_migration
+#  asyncio.run(blogs_fts_migration.upgrade())
+# after rebuilding an older blogs_fts, run VACUUM so the file shrinks:
+#  sqlite3 dependencies/database.db "VACUUM"
@@ -1,3 +1,6 @@
 from .users_models import User
 from .blogs_models import Blog
-from .admins_models import Admin
\ No newline at end of file
+from .admins_models import Admin
+from .jobs_models import Job
+from .tokens_models import RefreshToken
+from .tags_models import Tag, blog_tags
\ No newline at end of file
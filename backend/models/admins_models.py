@@ -1,8 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
-
-from passlib.hash import bcrypt
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index
 
 from dependencies.database import Base
 
@@ -15,9 +13,17 @@ class Admin(Base):
     is_admin = Column(Boolean, default=True)
     date_created = Column(DateTime, default=datetime.utcnow)
 
+    # keyset pagination of the admin list
+    __table_args__ = (Index("ix_admins_date_created_id", "date_created", "id"),)
+
+    # blocking, async code uses auth.password_hashing.PasswordHashServiceClass
     def verify_password(self, password: str) -> bool:
-        return bcrypt.verify(password, self.hashed_password)  
+        from auth.password_hashing import verify_password
+
+        return verify_password(password, self.hashed_password)
 
     @classmethod
     def hash_password(cls, password: str) -> str:
-        return bcrypt.hash(password)
+        from auth.password_hashing import hash_password
+
+        return hash_password(password)
@@ -1,9 +1,10 @@
 from datetime import datetime
 
-from sqlalchemy import Integer, Column, String, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Integer, Column, String, DateTime, ForeignKey, Index, event
+from sqlalchemy.orm import deferred, query_expression, relationship
 
 from dependencies.database import Base
+from utils.compression_utils import CompressedText
 
 def get_user():
     from .users_models import User
@@ -14,8 +15,37 @@ class Blog(Base):
     __tablename__ = 'blogs'
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    content = Column(String, index=True)
+    # zlib-compressed above BLOG_COMPRESSION_THRESHOLD, see utils/compression_utils.py
+    content = Column(CompressedText())
+    # sanitized HTML of content, rendered on write by utils/markdown_utils.py.
+    # deferred, only ?format=html reads load it
+    content_html = deferred(Column(CompressedText()), raiseload=True)
+    # RENDERER_VERSION content_html was rendered with, older rows are re-rendered
+    content_html_version = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # indexed for exports filtered with updated_since
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    owner = relationship("User", back_populates="blogs")
\ No newline at end of file
+    # written in batches by services/view_counter.py, not on every read
+    view_count = Column(Integer, nullable=False, default=0, server_default="0")
+    owner = relationship("User", back_populates="blogs")
+    # not a column: the list queries fill it with the first characters of content
+    excerpt = query_expression()
+
+    # keyset pagination of all blogs and of one owner's blogs
+    __table_args__ = (
+        Index("ix_blogs_created_at_id", "created_at", "id"),
+        Index("ix_blogs_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        # most viewed blogs, read backwards from the end of the index
+        Index("ix_blogs_view_count_id", "view_count", "id"),
+    )
+
+
+# full-text index over title and content, kept in sync by BlogServicesClass.
+# contentless: blogs holds the only copy of the text, compressed or not
+BLOGS_FTS_DDL = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts "
+    "USING fts5(title, content, content='', tokenize='unicode61 remove_diacritics 2')"
+)
+
+event.listen(Blog.__table__, "after_create", BLOGS_FTS_DDL)
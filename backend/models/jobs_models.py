@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String
+
+from dependencies.database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    # queued -> running -> succeeded | failed, a retried job goes back to queued
+    status = Column(String, nullable=False, default="queued")
+    payload = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON)
+    error = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer)
+    # no foreign key: the owner may be an admin, and a delete_user job outlives its user
+    owner_id = Column(Integer, nullable=False)
+    owner_is_admin = Column(Boolean, nullable=False, default=False)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # bumped by progress reports and heartbeats, a running job that stops updating is requeued
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    # workers pick the oldest due job of a status
+    __table_args__ = (Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),)
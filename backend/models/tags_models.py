@@ -0,0 +1,27 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table
+
+from dependencies.database import Base
+
+
+# which blogs carry which tags. the primary key serves "tags of a blog", the
+# reverse index "blogs of a tag"; both end in the other id so neither lookup
+# touches the table itself
+blog_tags = Table(
+    "blog_tags",
+    Base.metadata,
+    Column("blog_id", Integer, ForeignKey("blogs.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_blog_tags_tag_id_blog_id", "tag_id", "blog_id"),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    id = Column(Integer, primary_key=True, index=True)
+    # stored lowercased, see schemas.blogs_schema.TagName
+    name = Column(String, unique=True, index=True, nullable=False)
+    # blogs carrying the tag, kept up to date by TagServicesClass so counts never need COUNT(*)
+    blog_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # most used tags first
+    __table_args__ = (Index("ix_tags_blog_count_id", "blog_count", "id"),)
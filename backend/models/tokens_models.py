@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
+
+from dependencies.database import Base
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    # SHA-256 hex of the token, the token itself is only ever sent to the client.
+    # it is 256 random bits, so a fast hash is enough and a refresh costs no bcrypt
+    token_hash = Column(String, unique=True, index=True, nullable=False)
+    # every token rotated out of one login shares its family, reuse revokes them all
+    family_id = Column(String, nullable=False, index=True)
+    # no foreign key: the subject may be a user or an admin
+    subject_id = Column(Integer, nullable=False)
+    subject_is_admin = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    # set when the token is exchanged for its successor, presenting it again is reuse
+    used_at = Column(DateTime)
+    revoked_at = Column(DateTime)
+
+    # revoking or pruning every token of one account
+    __table_args__ = (Index("ix_refresh_tokens_subject", "subject_is_admin", "subject_id"),)
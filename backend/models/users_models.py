@@ -1,10 +1,8 @@
 from datetime import datetime
 
-from sqlalchemy import Integer, Column, String, DateTime, Boolean
+from sqlalchemy import Integer, Column, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship 
 
-from passlib.hash import bcrypt
-
 from dependencies.database import Base
 
 
@@ -23,14 +21,23 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     date_created = Column(DateTime, default=datetime.utcnow)
 
-    blogs = relationship("Blog", back_populates="owner", cascade="all, delete-orphan")
+    # blogs.owner_id is ON DELETE CASCADE, let the database remove them instead of loading each one
+    blogs = relationship("Blog", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+
+    # keyset pagination of the user list
+    __table_args__ = (Index("ix_users_date_created_id", "date_created", "id"),)
 
+    # blocking, async code uses auth.password_hashing.PasswordHashServiceClass
     def verify_password(self, password: str) -> bool:
-        return bcrypt.verify(password, self.hashed_password)  
+        from auth.password_hashing import verify_password
+
+        return verify_password(password, self.hashed_password)
 
     @classmethod
     def hash_password(cls, password: str) -> str:
-        return bcrypt.hash(password)
+        from auth.password_hashing import hash_password
+
+        return hash_password(password)
 
 # every time you chang anything from models run this command
 # alembic revision --autogenerate -m "your message"
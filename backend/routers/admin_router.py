@@ -1,19 +1,23 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
 from models.admins_models import Admin
 from schemas.admin_schema import AdminMaineSchema, AdminUpdate, AdminCreate
 from schemas.users_schema import User, UserUpdate
+from schemas.pagination_schema import Page
+from schemas.jobs_schema import Job
 
 from services.admin_service import AdminServicesClass
 from services.user_service import UserServicesClass
-from services.get_db_service import get_db
+from services.job_service import JobServicesClass
+from services.get_db_service import get_db, get_read_db
+from auth.principal_cache import user_principal_cache, admin_principal_cache
 from exceptions.handlers import handle_exception
+from utils.pagination_utils import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.serialization_utils import json_response
 
 load_dotenv()
 JWT_SECRET = os.getenv("JWT_SECRET")
@@ -25,41 +29,49 @@ router = APIRouter()
 @router.post("/admins", status_code=status.HTTP_201_CREATED, response_model=AdminMaineSchema)
 async def create_admin(
     admin: AdminCreate,
-    db: Session = Depends(get_db),
-) -> AdminMaineSchema:
-    db_admin = await AdminServicesClass.get_admin_by_email(email=admin.email, db=db)
-
-    if db_admin:
-        return handle_exception(400, "Admin already registered")
-
-    return await AdminServicesClass.create_admin(admin=admin, db=db)
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    new_admin = await AdminServicesClass.create_admin(admin=admin, db=db)
+    return json_response(AdminMaineSchema, new_admin, status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/admins", response_model=List[AdminMaineSchema])
-async def get_all_admins(db: Session = Depends(get_db)) -> List[AdminMaineSchema]:
-    return await AdminServicesClass.get_all_admins(db=db)
+@router.get("/admins", response_model=Page[AdminMaineSchema])
+async def get_all_admins(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    page = await AdminServicesClass.get_all_admins(db=db, cursor=cursor, limit=limit)
+    return json_response(Page[AdminMaineSchema], page)
 
 
 # Get current admin (no extra dependency required for this route)
 @router.get("/admins/me", response_model=AdminMaineSchema)
-async def get_current_admin(admin: Admin = Depends(AdminServicesClass.get_current_admin)):
-    return admin
+async def get_current_admin(admin: Admin = Depends(AdminServicesClass.get_current_admin)) -> Response:
+    return json_response(AdminMaineSchema, admin)
+
+
+# Hit/miss counters of the in-process principal caches
+@router.get("/admins/principal-cache", status_code=status.HTTP_200_OK)
+async def get_principal_cache_stats(admin=Depends(AdminServicesClass.get_current_admin)) -> dict:
+    return {"users": user_principal_cache.stats(), "admins": admin_principal_cache.stats()}
 
 
 @router.put("/admins/me", response_model=AdminMaineSchema, status_code=status.HTTP_200_OK)
 async def update_admin(
     admin_update: AdminUpdate,
     admin=Depends(AdminServicesClass.get_current_admin),
-    db: Session = Depends(get_db)
-) -> AdminMaineSchema:
-    return await AdminServicesClass.update_admin(admin_update=admin_update, admin=admin, db=db)
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    updated_admin = await AdminServicesClass.update_admin(admin_update=admin_update, admin=admin, db=db)
+    return json_response(AdminMaineSchema, updated_admin)
 
 # Update admin password endpoint
 # @router.put("/users/me/password", response_model=AdminMaineSchema, status_code=status.HTTP_200_OK)
 # async def update_admin_password(
 #     new_password: str,
 #     user=Depends(AdminServicesClass.get_current_admin),
-#     db: Session = Depends(get_db),
+#     db: AsyncSession = Depends(get_db),
 # ):
 #     updated_admin = await AdminServicesClass.update_user_password(
 #         user=user, new_password=new_password, db=db
@@ -70,7 +82,7 @@ async def update_admin(
 @router.delete("/admins/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_admin(
     admin=Depends(AdminServicesClass.get_current_admin),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     return await AdminServicesClass.delete_admin(db=db, admin=admin)
 
@@ -78,34 +90,42 @@ async def delete_admin(
 @router.get("/users/{user_id}", response_model=User)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin=Depends(AdminServicesClass.get_current_admin),
-) -> User:
+) -> Response:
     if not admin:
         handle_exception(401, "You are not Admin")
 
-    return await AdminServicesClass.get_user_by_id(user_id=user_id, db=db)
+    user = await AdminServicesClass.get_user_by_id(user_id=user_id, db=db)
+    return json_response(User, user)
 
 
 @router.put("/users/{user_id}", response_model=User, status_code=status.HTTP_200_OK)
 async def update_user_by_id(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin=Depends(AdminServicesClass.get_current_admin),
-) -> User:
+) -> Response:
     user = await AdminServicesClass.get_user_by_id(user_id=user_id, db=db)
     updated_user = await UserServicesClass.update_user(user_update=user_update, db=db, user=user)
-    return updated_user
+    return json_response(User, updated_user)
 
 
-@router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+# ?background=true answers 202 with a job to poll instead
+@router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, responses={202: {"model": Job}})
 async def delete_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
     admin=Depends(AdminServicesClass.get_current_admin),
 ):
     user = await AdminServicesClass.get_user_by_id(user_id=user_id, db=db)
+    if background:
+        job = await JobServicesClass.enqueue(
+            "delete_user", {"user_id": user.id}, owner_id=admin.id, owner_is_admin=True, db=db
+        )
+        return JobServicesClass.accepted(job)
     return await UserServicesClass.delete_user(db=db, user=user)
 
 
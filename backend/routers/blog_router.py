@@ -1,34 +1,204 @@
-from typing import List
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from schemas.blogs_schema import BlogCreate, Blog, BlogUpdate
+from schemas.blogs_schema import (
+    BlogCreate,
+    Blog,
+    BlogUpdate,
+    BlogSearchResult,
+    BlogSummary,
+    BlogViews,
+    BlogViewsSummary,
+    BlogListView,
+    BlogFormat,
+    BlogHtml,
+    BlogTagMatch,
+    TagCount,
+    BlogBulkResult,
+    BlogBulkCreateList,
+    BlogBulkUpdateList,
+    BlogBulkDeleteList,
+)
 from schemas import users_schema  
+from schemas.pagination_schema import Page
+from schemas.jobs_schema import Job
 
-from services.blog_service import BlogServicesClass
+from services.blog_service import BlogServicesClass, blog_list_shape, blog_shape
 from services.user_service import UserServicesClass  
-from services.get_db_service import get_db
+from services.search_service import SearchServicesClass
+from services.admin_service import AdminServicesClass
+from services.job_service import JobServicesClass
+from services.tag_service import TagServicesClass
+from services.get_db_service import get_db, get_read_db
+from services.view_counter import view_counter
+from utils.pagination_utils import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.conditional_utils import apply_validators, is_not_modified, not_modified_response
+from utils.serialization_utils import json_response
 
 router = APIRouter()
 
-@router.get("/blogs/{blog_id}", response_model=Blog, status_code=status.HTTP_200_OK)
+# declared before /blogs/{blog_id} so "search", "export" and "most-viewed" are not parsed as ids
+@router.get("/blogs/search", response_model=Page[BlogSearchResult], status_code=status.HTTP_200_OK)
+async def search_blogs(
+    q: str = Query(..., min_length=1),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    page = await SearchServicesClass.search_blogs(q=q, db=db, cursor=cursor, limit=limit)
+    return json_response(Page[BlogSearchResult], page)
+
+# Stream every blog as NDJSON, optionally only one owner's or those updated since a time
+@router.get("/blogs/export", status_code=status.HTTP_200_OK)
+async def export_blogs(
+    format: str = Query("ndjson", pattern="^ndjson$"),
+    owner_id: int | None = None,
+    updated_since: datetime | None = None,
+    admin=Depends(AdminServicesClass.get_current_admin),
+) -> StreamingResponse:
+    return StreamingResponse(
+        BlogServicesClass.export_blogs(owner_id=owner_id, updated_since=updated_since),
+        media_type="application/x-ndjson",
+    )
+
+# Same export written to a file by a background job, fetched from /jobs/{job_id}/download
+@router.post("/blogs/export/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    owner_id: int | None = None,
+    updated_since: datetime | None = None,
+    admin=Depends(AdminServicesClass.get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    job = await JobServicesClass.enqueue(
+        "export_blogs",
+        {"owner_id": owner_id, "updated_since": updated_since},
+        owner_id=admin.id,
+        owner_is_admin=True,
+        db=db,
+    )
+    return JobServicesClass.accepted(job)
+
+# Bulk endpoints, each request runs in a single transaction
+@router.post("/blogs/bulk", response_model=list[BlogBulkResult], status_code=status.HTTP_201_CREATED)
+async def create_blogs_bulk(
+    blogs: BlogBulkCreateList,
+    user: users_schema.User = Depends(UserServicesClass.get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> list[BlogBulkResult]:
+    return await BlogServicesClass.create_blogs_bulk(user=user, db=db, blogs=blogs)
+
+@router.patch("/blogs/bulk", response_model=list[BlogBulkResult], status_code=status.HTTP_200_OK)
+async def update_blogs_bulk(
+    blogs: BlogBulkUpdateList,
+    user: users_schema.User = Depends(UserServicesClass.get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> list[BlogBulkResult]:
+    return await BlogServicesClass.update_blogs_bulk(user=user, db=db, blogs=blogs)
+
+# ?background=true answers 202 with a job whose result holds the per-item outcomes
+@router.delete(
+    "/blogs/bulk",
+    response_model=list[BlogBulkResult],
+    status_code=status.HTTP_200_OK,
+    responses={202: {"model": Job}},
+)
+async def delete_blogs_bulk(
+    blog_ids: BlogBulkDeleteList = Body(...),
+    background: bool = False,
+    user: users_schema.User = Depends(UserServicesClass.get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> list[BlogBulkResult]:
+    if background:
+        job = await JobServicesClass.enqueue(
+            "delete_blogs_bulk",
+            {"owner_id": user.id, "blog_ids": blog_ids},
+            owner_id=user.id,
+            owner_is_admin=False,
+            db=db,
+        )
+        return JobServicesClass.accepted(job)
+    return await BlogServicesClass.delete_blogs_bulk(user=user, db=db, blog_ids=blog_ids)
+
+# Summaries of the blogs tagged with every ?tag= (match=all) or with any of them
+@router.get("/blogs", response_model=Page[BlogSummary], status_code=status.HTTP_200_OK)
+async def get_blogs_by_tags(
+    tag: list[str] = Query(..., min_length=1),
+    match: BlogTagMatch = "all",
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    page = await TagServicesClass.get_blogs_by_tags(db=db, names=tag, match=match, cursor=cursor, limit=limit)
+    return json_response(Page[BlogSummary], page)
+
+# Tags in use with how many blogs carry each, most used first
+@router.get("/tags", response_model=list[TagCount], status_code=status.HTTP_200_OK)
+async def get_tag_counts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    tags = await TagServicesClass.get_tag_counts(db=db, limit=limit)
+    return json_response(list[TagCount], tags)
+
+@router.get("/blogs/{blog_id}/tags", response_model=list[str], status_code=status.HTTP_200_OK)
+async def get_blog_tags(blog_id: int, db: AsyncSession = Depends(get_read_db)) -> list[str]:
+    return await TagServicesClass.get_blog_tags(blog_id=blog_id, db=db)
+
+# Summaries of the most viewed blogs, counts lag behind by up to one counter flush
+@router.get("/blogs/most-viewed", response_model=list[BlogViewsSummary], status_code=status.HTTP_200_OK)
+async def get_most_viewed_blogs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    blogs = await BlogServicesClass.get_most_viewed_blogs(db=db, limit=limit)
+    return json_response(list[BlogViewsSummary], blogs)
+
+# Views of one blog, including those not flushed yet. not cached, unlike the blog itself
+@router.get("/blogs/{blog_id}/views", response_model=BlogViews, status_code=status.HTTP_200_OK)
+async def get_blog_views(
+    blog_id: int,
+    user: users_schema.User = Depends(UserServicesClass.get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    views = await BlogServicesClass.get_blog_views(blog_id=blog_id, user=user, db=db)
+    return json_response(BlogViews, views)
+
+# the markdown as written, or sanitized HTML rendered at write time with ?format=html
+@router.get("/blogs/{blog_id}", response_model=Blog | BlogHtml, status_code=status.HTTP_200_OK)
 async def get_one_blog_from_current_user(
     blog_id: int,
+    request: Request,
+    format: BlogFormat = "markdown",
     user: users_schema.User = Depends(UserServicesClass.get_current_user),
-    db: Session = Depends(get_db)
-) -> Blog:
-    spesific_blog = await BlogServicesClass.get_one_blog_from_current_user(blog_id=blog_id, user=user, db=db)
-    return Blog.from_orm(spesific_blog)
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    validators = await BlogServicesClass.get_blog_validators(blog_id=blog_id, user=user, db=db, format=format)
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+
+    spesific_blog = await BlogServicesClass.get_one_blog_from_current_user(
+        blog_id=blog_id, user=user, db=db, format=format
+    )
+    # a revalidation is not a new view
+    view_counter.record(blog_id)
+    response = json_response(blog_shape(format), spesific_blog)
+    # taken from the row actually sent, in case it changed since the validators were read
+    apply_validators(
+        response, BlogServicesClass.blog_validators(spesific_blog.id, spesific_blog.updated_at, format)
+    )
+    return response
 
 @router.post("/blogs", response_model=Blog, status_code=status.HTTP_201_CREATED)
 async def create_blog(
     blog: BlogCreate, 
     user: users_schema.User = Depends(UserServicesClass.get_current_user), 
-    db: Session = Depends(get_db)
-) -> Blog:
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     new_blog = await BlogServicesClass.create_blog(blog=blog, user=user, db=db)
-    return Blog.from_orm(new_blog)
+    return json_response(Blog, new_blog, status_code=status.HTTP_201_CREATED)
 
 
 @router.put("/blogs/{blog_id}", response_model=Blog, status_code=status.HTTP_200_OK)
@@ -36,19 +206,33 @@ async def update_blog(
     blog: BlogUpdate, 
     blog_id: int, 
     user: users_schema.User = Depends(UserServicesClass.get_current_user), 
-    db: Session = Depends(get_db)
-) -> Blog:
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     updated_blog = await BlogServicesClass.update_blog(blog=blog, blog_id=blog_id, user=user, db=db)
-    return Blog.from_orm(updated_blog)
+    return json_response(Blog, updated_blog)
 
 @router.delete("/blogs/{blog_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_blog(
     blog_id: int, 
     user: users_schema.User = Depends(UserServicesClass.get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     await BlogServicesClass.delete_blog(blog_id=blog_id, user=user, db=db)
 
-@router.get("/all/blogs", response_model=List[Blog], status_code=status.HTTP_200_OK)
-async def get_all_blogs(db: Session = Depends(get_db)) -> List[Blog]:
-    return await BlogServicesClass.get_all_blogs(db=db)
\ No newline at end of file
+# summaries (no content, an excerpt instead) unless ?view=full
+@router.get("/all/blogs", response_model=Page[BlogSummary] | Page[Blog], status_code=status.HTTP_200_OK)
+async def get_all_blogs(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    view: BlogListView = "summary",
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    validators = await BlogServicesClass.get_blogs_validators(db=db, cursor=cursor, limit=limit, view=view)
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+
+    page = await BlogServicesClass.get_all_blogs(db=db, cursor=cursor, limit=limit, view=view)
+    response = json_response(blog_list_shape(view), page)
+    apply_validators(response, validators)
+    return response
\ No newline at end of file
@@ -0,0 +1,42 @@
+import os
+
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.jobs_schema import Job
+
+from services.job_service import JobServicesClass, export_path
+from services.get_db_service import get_read_db
+from exceptions.handlers import handle_exception
+from utils.serialization_utils import json_response
+
+router = APIRouter()
+
+
+# Status, progress and result of a job created by the caller
+@router.get("/jobs/{job_id}", response_model=Job, status_code=status.HTTP_200_OK)
+async def get_job(
+    job_id: int,
+    owner: tuple[int, bool] = Depends(JobServicesClass.get_job_owner),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    job = await JobServicesClass.get_job(job_id=job_id, owner=owner, db=db)
+    return json_response(Job, job)
+
+
+# NDJSON file of a finished export job
+@router.get("/jobs/{job_id}/download", status_code=status.HTTP_200_OK)
+async def download_job_result(
+    job_id: int,
+    owner: tuple[int, bool] = Depends(JobServicesClass.get_job_owner),
+    db: AsyncSession = Depends(get_read_db),
+) -> FileResponse:
+    job = await JobServicesClass.get_job(job_id=job_id, owner=owner, db=db)
+    if job.kind != "export_blogs":
+        handle_exception(404, "Job has no file")
+    if job.status != "succeeded" or not os.path.exists(export_path(job.id)):
+        handle_exception(409, "Job has not finished")
+    return FileResponse(
+        export_path(job.id), media_type="application/x-ndjson", filename=f"blogs-export-{job.id}.ndjson"
+    )
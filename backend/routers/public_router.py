@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Request, Response, status
+
+from schemas.blogs_schema import Blog, BlogFormat, BlogHtml
+from services.public_blog_service import PublicBlogServicesClass
+from services.view_counter import view_counter
+from utils.conditional_utils import apply_validators, is_not_modified, not_modified_response
+
+router = APIRouter()
+
+
+# Any blog, no token needed. Served from the hot-post cache of encoded bodies
+@router.get("/public/blogs/{blog_id}", response_model=Blog | BlogHtml, status_code=status.HTTP_200_OK)
+async def get_public_blog(blog_id: int, request: Request, format: BlogFormat = "markdown") -> Response:
+    cached = await PublicBlogServicesClass.get_blog(blog_id, format)
+    if is_not_modified(request, cached.validators):
+        return not_modified_response(cached.validators)
+
+    # a revalidation is not a new view
+    view_counter.record(blog_id)
+    response = Response(cached.body, media_type="application/json")
+    apply_validators(response, cached.validators)
+    return response
@@ -2,22 +2,58 @@ from fastapi.security import OAuth2PasswordRequestForm
 from services.admin_service import AdminServicesClass
 from services.user_service import UserServicesClass
 from exceptions.handlers import handle_exception
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from services.get_db_service import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from auth.create_token import TokenServiceClass
+from auth.login_throttle import LoginThrottle, user_login_throttle, admin_login_throttle
+from auth.principal_cache import Principal, user_principal_cache, admin_principal_cache
+from models.users_models import User
+from models.admins_models import Admin
+from schemas.tokens_schema import RefreshRequest, TokenPair
+from services.refresh_token_service import RefreshTokenServicesClass
 
 
 router = APIRouter()
 
 
+# runs `authenticate` behind the throttle: rejected attempts never reach the
+# database or bcrypt, wrong passwords count against the account
+async def _throttled(throttle: LoginThrottle, request: Request, email: str, authenticate):
+    throttle.check(request, email)
+    try:
+        principal = await authenticate()
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            throttle.failed(email)
+        raise
+    throttle.succeeded(email)
+    return principal
+
+
+# the account a refresh token was issued to, from the principal cache when possible
+async def _refresh_subject(db: AsyncSession, model, cache, subject_id: int) -> Principal:
+    principal = cache.get(subject_id)
+    if principal:
+        return principal
+    account = await db.get(model, subject_id)
+    if not account:
+        handle_exception(401, "Invalid refresh token")
+    principal = Principal.from_orm(account)
+    cache.set(subject_id, principal)
+    return principal
+
+
 # Endpoint to generate JWT token for authentication
 @router.post("/users/token", status_code=status.HTTP_200_OK)
 async def generate_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
-    user = await UserServicesClass.authenticate_user(
-        email=form_data.username, password=form_data.password, db=db
+    user = await _throttled(
+        user_login_throttle,
+        request,
+        form_data.username,
+        lambda: UserServicesClass.authenticate_user(email=form_data.username, password=form_data.password, db=db),
     )
 
     if not user:
@@ -27,18 +63,22 @@ async def generate_token(
     token = TokenServiceClass.create_access_token(
         data={"sub": user.email, "id": user.id, "is_user": user.is_admin}
     )
+    refresh_token = await RefreshTokenServicesClass.issue(db, user.id, is_admin=False)
 
-    return {"access_token": token, "token_type": "bearer"}
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer"}
 
     # return await UserServicesClass.create_token(user=user)
 
 
 @router.post("/admins/token", status_code=status.HTTP_200_OK)
 async def generate_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
-    admin = await AdminServicesClass.authenticate_admin(
-        email=form_data.username, password=form_data.password, db=db
+    admin = await _throttled(
+        admin_login_throttle,
+        request,
+        form_data.username,
+        lambda: AdminServicesClass.authenticate_admin(email=form_data.username, password=form_data.password, db=db),
     )
 
     if not admin:
@@ -48,5 +88,41 @@ async def generate_token(
     token = TokenServiceClass.create_access_token(
         data={"sub": admin.email, "id": admin.id, "is_admin": admin.is_admin}
     )
+    refresh_token = await RefreshTokenServicesClass.issue(db, admin.id, is_admin=True)
+
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+# New access token for a refresh token, no password and no bcrypt. The refresh
+# token is rotated: the response carries its successor and it stops working
+@router.post("/users/token/refresh", response_model=TokenPair, status_code=status.HTTP_200_OK)
+async def refresh_user_token(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    user_id, refresh_token = await RefreshTokenServicesClass.rotate(db, body.refresh_token, is_admin=False)
+    user = await _refresh_subject(db, User, user_principal_cache, user_id)
+
+    token = TokenServiceClass.create_access_token(
+        data={"sub": user.email, "id": user.id, "is_user": user.is_admin}
+    )
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+@router.post("/admins/token/refresh", response_model=TokenPair, status_code=status.HTTP_200_OK)
+async def refresh_admin_token(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    admin_id, refresh_token = await RefreshTokenServicesClass.rotate(db, body.refresh_token, is_admin=True)
+    admin = await _refresh_subject(db, Admin, admin_principal_cache, admin_id)
+
+    token = TokenServiceClass.create_access_token(
+        data={"sub": admin.email, "id": admin.id, "is_admin": admin.is_admin}
+    )
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+# Logout: revokes the refresh token and every token rotated from the same login
+@router.post("/users/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_token(body: RefreshRequest, db: AsyncSession = Depends(get_db)) -> None:
+    await RefreshTokenServicesClass.revoke(db, body.refresh_token, is_admin=False)
+
 
-    return {"access_token": token, "token_type": "bearer"}
+@router.post("/admins/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_admin_token(body: RefreshRequest, db: AsyncSession = Depends(get_db)) -> None:
+    await RefreshTokenServicesClass.revoke(db, body.refresh_token, is_admin=True)
@@ -1,43 +1,56 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas.users_schema import UserCreate, User, UserUpdate
-from schemas.blogs_schema import Blog
+from schemas.blogs_schema import Blog, BlogSummary, BlogListView
+from schemas.pagination_schema import Page
+from schemas.jobs_schema import Job
 
 from services.user_service import UserServicesClass
-from services.get_db_service import get_db
+from services.blog_service import BlogServicesClass, blog_list_shape
+from services.job_service import JobServicesClass
+from services.get_db_service import get_db, get_read_db
 
 from exceptions.handlers import handle_exception
+from utils.pagination_utils import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.conditional_utils import apply_validators, is_not_modified, not_modified_response
+from utils.serialization_utils import json_response
 
 router = APIRouter()
 
 
 # Endpoint to get all users
-@router.get("/users", response_model=List[User])
-async def get_all_users(db: Session = Depends(get_db)) -> List[User]:
-    return await UserServicesClass.get_all_users(db=db)
+@router.get("/users", response_model=Page[User])
+async def get_all_users(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    page = await UserServicesClass.get_all_users(db=db, cursor=cursor, limit=limit)
+    return json_response(Page[User], page)
 
 
 # Endpoint to create a new user
 @router.post("/users", response_model=User, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)) -> User:
-    # Check if email is already registered
-    db_user = await UserServicesClass.get_user_by_email(email=user.email, db=db)
-
-    if db_user:
-        return handle_exception(400, "Email already registered")
-
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)) -> Response:
+    # a taken email or username is reported by the service as a 400
     new_user = await UserServicesClass.create_user(user=user, db=db)
 
-    return new_user
+    return json_response(User, new_user, status_code=status.HTTP_201_CREATED)
 
 
 # Endpoint to get the currently authenticated user
 @router.get("/users/me", response_model=User)
-async def get_current_user(user: User = Depends(UserServicesClass.get_current_user)) -> User:
-    return user
+async def get_current_user(
+    request: Request,
+    user: User = Depends(UserServicesClass.get_current_user),
+) -> Response:
+    validators = UserServicesClass.get_user_validators(user)
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    response = json_response(User, user)
+    apply_validators(response, validators)
+    return response
 
 # Update user endpoint
 @router.put("/users/me", response_model=User, status_code=status.HTTP_200_OK)
@@ -46,13 +59,13 @@ async def update_user(
     user=Depends(
         UserServicesClass.get_current_user
     ),  # Ensure the user is authenticated
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     updated_user = await UserServicesClass.update_user(
         user_update=user_update, db=db, user=user
     )
     # Return the updated user
-    return updated_user
+    return json_response(User, updated_user)
 
 
 # Update user password endpoint
@@ -60,7 +73,7 @@ async def update_user(
 # async def update_user_password(
 #     new_password: str,
 #     user=Depends(UserServicesClass.get_current_user),
-#     db: Session = Depends(get_db),
+#     db: AsyncSession = Depends(get_db),
 # ):
 #     updated_user = await UserServicesClass.update_user_password(
 #         user=user, new_password=new_password, db=db
@@ -68,20 +81,42 @@ async def update_user(
 #     return updated_user
 
 
-# Endpoint to delete user
-@router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
+# Endpoint to delete user, ?background=true answers 202 with a job to poll instead
+@router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT, responses={202: {"model": Job}})
 async def delete_user(
+    background: bool = False,
     # This dependency returns a SQLAlchemy User instance
     user=Depends(UserServicesClass.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
+    if background:
+        job = await JobServicesClass.enqueue(
+            "delete_user", {"user_id": user.id}, owner_id=user.id, owner_is_admin=False, db=db
+        )
+        return JobServicesClass.accepted(job)
     return await UserServicesClass.delete_user(db=db, user=user)
 
 
 # Get all blogs for current user
-@router.get("/users/me/blogs", response_model=list[Blog], status_code=status.HTTP_200_OK)
+# summaries (no content, an excerpt instead) unless ?view=full
+@router.get("/users/me/blogs", response_model=Page[BlogSummary] | Page[Blog], status_code=status.HTTP_200_OK)
 async def get_all_blogs_for_current_user(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    view: BlogListView = "summary",
     user=Depends(UserServicesClass.get_current_user),
-    db: Session = Depends(get_db),
-) -> list[Blog]:
-    return await UserServicesClass.get_all_blogs_for_current_user(user=user, db=db)
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    validators = await BlogServicesClass.get_blogs_validators(
+        db=db, cursor=cursor, limit=limit, owner_id=user.id, view=view
+    )
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+
+    page = await UserServicesClass.get_all_blogs_for_current_user(
+        user=user, db=db, cursor=cursor, limit=limit, view=view
+    )
+    response = json_response(blog_list_shape(view), page)
+    apply_validators(response, validators)
+    return response
@@ -1,6 +1,19 @@
+import os
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Literal, Optional
+
+# largest list accepted by the bulk endpoints, keeps the ownership check to one IN query
+BLOG_BULK_MAX_ITEMS = int(os.getenv("BLOG_BULK_MAX_ITEMS", "10000"))
+# characters of content in a BlogSummary
+BLOG_EXCERPT_LENGTH = int(os.getenv("BLOG_EXCERPT_LENGTH", "200"))
+# tags one blog may carry
+BLOG_MAX_TAGS = int(os.getenv("BLOG_MAX_TAGS", "20"))
+
+# shape of the items of a blog list: summaries by default, whole posts on request
+BlogListView = Literal["summary", "full"]
+# representation of a single blog: the markdown as written, or rendered to HTML
+BlogFormat = Literal["markdown", "html"]
 
 
 class BlogBase(BaseModel):
@@ -8,10 +21,34 @@ class BlogBase(BaseModel):
     content: str
 
 
+# tags compare case-insensitively, they are stored lowercased
+TagName = Annotated[str, StringConstraints(strip_whitespace=True, to_lower=True, min_length=1, max_length=50)]
+BlogTagList = Annotated[list[TagName], Field(max_length=BLOG_MAX_TAGS)]
+# ?tag=a&tag=b matches blogs with every tag ("all") or with at least one ("any")
+BlogTagMatch = Literal["all", "any"]
+
+
 class BlogCreate(BlogBase):
-    pass
+    tags: BlogTagList = []
 class BlogUpdate(BlogBase):
-    pass
+    # None leaves the tags as they are, [] removes them all
+    tags: BlogTagList | None = None
+
+class BlogBulkUpdate(BlogBase):
+    id: int
+
+
+BlogBulkCreateList = Annotated[list[BlogCreate], Field(min_length=1, max_length=BLOG_BULK_MAX_ITEMS)]
+BlogBulkUpdateList = Annotated[list[BlogBulkUpdate], Field(min_length=1, max_length=BLOG_BULK_MAX_ITEMS)]
+BlogBulkDeleteList = Annotated[list[int], Field(min_length=1, max_length=BLOG_BULK_MAX_ITEMS)]
+
+
+# outcome of one item of a bulk request, `index` is its position in the request
+class BlogBulkResult(BaseModel):
+    index: int
+    id: int | None = None
+    status: int
+    detail: str | None = None
 
 class BlogResponse(BlogBase):
     id: int
@@ -24,3 +61,60 @@ class Blog(BlogBase):
 
     class Config:
         from_attributes  = True
+
+
+# a blog with its content rendered to sanitized HTML instead of the markdown
+class BlogHtml(BaseModel):
+    id: int
+    title: str
+    content_html: str
+    owner_id: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# list item without the content, only its first BLOG_EXCERPT_LENGTH characters
+class BlogSummary(BaseModel):
+    id: int
+    title: str
+    owner_id: int
+    created_at: datetime
+    updated_at: datetime
+    excerpt: str | None = None
+
+    class Config:
+        from_attributes = True
+        # a full post must not validate as a summary when a route answers with either
+        extra = "forbid"
+
+
+# view counts change with every flush of the view counter, so they are kept out
+# of the blog representations above and their ETags and served on their own
+class BlogViewsSummary(BlogSummary):
+    view_count: int
+
+
+class BlogViews(BaseModel):
+    id: int
+    view_count: int
+
+
+class BlogSearchResult(BaseModel):
+    id: int
+    title: str
+    owner_id: int
+    created_at: datetime
+    updated_at: datetime
+    snippet: str
+    rank: float
+
+
+class TagCount(BaseModel):
+    name: str
+    blog_count: int
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,8 @@
 from fastapi import  Depends
-from sqlalchemy.orm import Session
-from email_validator import validate_email, EmailNotValidError
-import bcrypt
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from jwt import PyJWTError, decode, ExpiredSignatureError
 from dotenv import load_dotenv
 import os
@@ -12,10 +13,16 @@ from models.users_models import User
 from models.admins_models import Admin
 from schemas import admin_schema
 from schemas.admin_schema import AdminMaineSchema, AdminCreate, AdminUpdate
+from schemas.pagination_schema import Page
 
-from services.get_db_service import get_db
+from services.get_db_service import get_read_db
 from exceptions.handlers import handle_exception
-from utils.services_utils import handle_exceptions, get_or_404, authorize_user
+from auth.password_hashing import PasswordHashServiceClass
+from auth.principal_cache import Principal, admin_principal_cache
+from services.refresh_token_service import RefreshTokenServicesClass
+from utils.email_utils import email_validation
+from utils.services_utils import handle_exceptions, get_or_404, authorize_user, raise_unique_violation
+from utils.pagination_utils import paginate
 
 load_dotenv()
 
@@ -31,58 +38,75 @@ if not ALGORITHM:
 
 admin_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/1/admin/token")
 
+# 400 details for the unique columns of the admins table
+ADMIN_UNIQUE_MESSAGES = {
+    "email": "Email already registered",
+    "username": "Username already taken",
+}
+
 
 class AdminServicesClass:
 
     @staticmethod
     @handle_exceptions
-    async def create_admin(admin: AdminCreate, db: Session) -> AdminMaineSchema:
-        existing_admin = await AdminServicesClass.get_admin_by_email(admin.email, db)
-        if existing_admin:
-            handle_exception(400, "Email already registered")
-
-        try:
-            valid = validate_email(admin.email)
-            email = valid.email
-        except EmailNotValidError:
-            handle_exception(400, "Invalid email format")
+    async def create_admin(admin: AdminCreate, db: AsyncSession) -> Admin:
+        email = await email_validation.normalize(admin.email)
 
-        hashed_password = bcrypt.hashpw(admin.password.encode(
-            "utf-8"), bcrypt.gensalt()).decode("utf-8")
+        hashed_password = await PasswordHashServiceClass.hash_password(admin.password)
 
-        admin_obj = Admin(
-            email=email, username=admin.username, hashed_password=hashed_password, is_admin=True
-        )
-
-        db.add(admin_obj)
-        db.commit()
-        db.refresh(admin_obj)
-        return AdminMaineSchema.from_orm(admin_obj)
+        # duplicates are caught by the unique constraints, RETURNING hands back id and defaults
+        try:
+            admin_obj = await db.scalar(
+                insert(Admin)
+                .values(email=email, username=admin.username, hashed_password=hashed_password, is_admin=True)
+                .returning(Admin)
+            )
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            # the signup route always answered a taken admin email with this detail
+            raise_unique_violation(e, {**ADMIN_UNIQUE_MESSAGES, "email": "Admin already registered"})
+        return admin_obj
 
     @staticmethod
     @handle_exceptions
-    async def get_all_admins(db: Session) -> list[AdminMaineSchema]:
-        admins = db.query(Admin).all()
-        return list(map(AdminMaineSchema.from_orm, admins))
+    async def get_all_admins(db: AsyncSession, cursor: str | None, limit: int) -> Page:
+        admins, next_cursor = await paginate(
+            db, select(Admin), Admin.date_created, Admin.id, cursor, limit
+        )
+        # items stay ORM rows, the router validates them once while encoding
+        return Page(items=admins, next_cursor=next_cursor)
 
     @staticmethod
     @handle_exceptions
-    async def authenticate_admin(email: str, password: str, db: Session) -> Admin:
-        admin = db.query(Admin).filter(Admin.email == email).first()
-        if not admin or not bcrypt.checkpw(password.encode("utf-8"), admin.hashed_password.encode("utf-8")):
+    async def authenticate_admin(email: str, password: str, db: AsyncSession) -> Admin:
+        admin = await db.scalar(select(Admin).filter(Admin.email == email).limit(1))
+        if not admin:
+            handle_exception(401, "Incorrect email or password")
+        valid, new_hash = await PasswordHashServiceClass.verify_and_update(password, admin.hashed_password)
+        if not valid:
             handle_exception(401, "Incorrect email or password")
 
         if not admin.is_admin:
             handle_exception(
                 403, "You do not have permission to access this resource")
 
+        # outdated algorithm or cost, see UserServicesClass.authenticate_user
+        if new_hash:
+            await db.execute(
+                update(Admin)
+                .where(Admin.id == admin.id, Admin.hashed_password == admin.hashed_password)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+            set_committed_value(admin, "hashed_password", new_hash)
         return admin
 
     @staticmethod
     async def get_current_admin(
         token: str = Depends(admin_oauth2_scheme),
-        db: Session = Depends(get_db)
-    ) -> AdminMaineSchema:
+        db: AsyncSession = Depends(get_read_db)
+    ) -> Principal:
         try:
             payload = decode(token, JWT_SECRET, algorithms=[ALGORITHM])
             admin_id = payload.get("id")
@@ -92,8 +116,14 @@ class AdminServicesClass:
                 handle_exception(
                     403, "You do not have permission to access this resource")
 
+            principal = admin_principal_cache.get(admin_id)
+            if principal:
+                return principal
+
             admin = await AdminServicesClass.get_admin_by_id(admin_id, db)
-            return admin
+            principal = Principal.from_orm(admin)
+            admin_principal_cache.set(admin_id, principal)
+            return principal
 
         except ExpiredSignatureError:
             raise handle_exception(401, "Token expired")
@@ -102,47 +132,54 @@ class AdminServicesClass:
 
     @staticmethod
     @handle_exceptions
-    async def get_admin_by_id(admin_id: int, db: Session) -> AdminMaineSchema:
-        orm_admin = get_or_404(Admin, db, id=admin_id)
+    async def get_admin_by_id(admin_id: int, db: AsyncSession) -> AdminMaineSchema:
+        orm_admin = await get_or_404(Admin, db, id=admin_id)
         return orm_admin
 
     @staticmethod
-    async def get_admin_by_email(email: str, db: Session) -> Admin | None:
+    async def get_admin_by_email(email: str, db: AsyncSession) -> Admin | None:
         try:
-            return db.query(Admin).filter(Admin.email == email).first()
+            return await db.scalar(select(Admin).filter(Admin.email == email).limit(1))
         except Exception as e:
             print(f"from get_admin_by_email: {str(e)}")
             raise handle_exception(500, str(e))
 
     @staticmethod
     @handle_exceptions
-    async def update_admin(admin_update: AdminUpdate, db: Session, admin: Admin) -> AdminMaineSchema:
-        if admin_update.email:
-            existing_user = await AdminServicesClass.get_admin_by_email(admin_update.email, db)
-            if existing_user and existing_user.id != admin.id:
-                handle_exception(400, "Email already registered")
+    async def update_admin(admin_update: AdminUpdate, db: AsyncSession, admin: Admin | Principal) -> Admin:
+        values = {key: value for key, value in admin_update.model_dump().items() if value}
+        if not values:
+            return await get_or_404(Admin, db, id=admin.id)
+        # stored the way signup stores it, or the unique constraint and login miss it
+        if "email" in values:
+            values["email"] = await email_validation.normalize(values["email"])
 
-        if admin_update.username:
-            admin.username = admin_update.username
-        if admin_update.email:
-            admin.email = admin_update.email
-
-        db.commit()
-        db.refresh(admin)
-
-        updated_admin_schema = AdminMaineSchema.from_orm(admin)
-        return updated_admin_schema
+        try:
+            updated = await db.scalar(
+                update(Admin).where(Admin.id == admin.id).values(**values).returning(Admin)
+            )
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise_unique_violation(e, ADMIN_UNIQUE_MESSAGES)
+
+        if not updated:
+            handle_exception(404, "Admin not found")
+        admin_principal_cache.invalidate(admin.id)
+        return updated
 
     @staticmethod
     @handle_exceptions
-    async def delete_admin(db: Session, admin: Admin) -> dict | None:
-        get_or_404(Admin, db, id=admin.id)
-        db.delete(admin)
-        db.commit()
+    async def delete_admin(db: AsyncSession, admin: Admin | Principal) -> dict | None:
+        admin = await get_or_404(Admin, db, id=admin.id)
+        await db.delete(admin)
+        await RefreshTokenServicesClass.delete_all(db, admin.id, is_admin=True)
+        await db.commit()
+        admin_principal_cache.invalidate(admin.id)
         return {}
 
     @staticmethod
     @handle_exceptions
-    async def get_user_by_id(user_id: int, db: Session) -> User: 
-        user = get_or_404(User, db, id=user_id)
+    async def get_user_by_id(user_id: int, db: AsyncSession) -> User: 
+        user = await get_or_404(User, db, id=user_id)
         return user
@@ -1,7 +1,19 @@
-from sqlalchemy.orm import Session
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
 from schemas import users_schema, blogs_schema  
+from schemas.pagination_schema import Page
 from models.blogs_models import Blog
+from dependencies.database import ReadSessionLocal
+from services.search_service import SearchServicesClass
+from services.public_blog_service import PublicBlogServicesClass
+from services.tag_service import TagServicesClass
+from services.view_counter import view_counter
 
 import os
 from dotenv import load_dotenv
@@ -9,9 +21,75 @@ from dotenv import load_dotenv
 from exceptions.handlers import handle_exception
 
 from utils.services_utils import get_or_404, authorize_user, handle_exceptions
+from utils.pagination_utils import keyset_page, paginate
+from utils.conditional_utils import Validators, make_etag
+from utils.blog_query_utils import blog_list_query
+from utils.markdown_utils import RENDERER_VERSION, render_markdown, rendered_html
 
 load_dotenv()
 
+EXPORT_BATCH_SIZE = 1000
+# rows per executemany statement in the bulk endpoints
+BLOG_BULK_CHUNK_SIZE = int(os.getenv("BLOG_BULK_CHUNK_SIZE", "500"))
+
+
+def _chunks(items: list, size: int = BLOG_BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# rendered columns of a blog written with `content`
+def html_values(content: str | None) -> dict:
+    return {"content_html": render_markdown(content), "content_html_version": RENDERER_VERSION}
+
+
+# ?format=html shape of a blog loaded with content_html undeferred; rows
+# rendered by an older renderer (not migrated yet) are rendered again here
+def blog_html(blog: Blog) -> blogs_schema.BlogHtml:
+    return blogs_schema.BlogHtml(
+        id=blog.id,
+        title=blog.title,
+        content_html=rendered_html(blog.content, blog.content_html, blog.content_html_version),
+        owner_id=blog.owner_id,
+        created_at=blog.created_at,
+        updated_at=blog.updated_at,
+    )
+
+
+# response shape of a single blog in the given format
+def blog_shape(format: blogs_schema.BlogFormat):
+    return blogs_schema.BlogHtml if format == "html" else blogs_schema.Blog
+
+
+# response shape of a list page of the given view
+def blog_list_shape(view: blogs_schema.BlogListView):
+    return Page[blogs_schema.Blog] if view == "full" else Page[blogs_schema.BlogSummary]
+
+
+def _export_query(owner_id: int | None, updated_since: datetime | None):
+    stmt = select(
+        Blog.id, Blog.title, Blog.content, Blog.owner_id, Blog.created_at, Blog.updated_at
+    ).order_by(Blog.id)
+    if owner_id is not None:
+        stmt = stmt.where(Blog.owner_id == owner_id)
+    if updated_since is not None:
+        stmt = stmt.where(Blog.updated_at >= updated_since)
+    return stmt
+
+
+# one NDJSON line of the export
+def _export_line(row) -> str:
+    return json.dumps(
+        {
+            "id": row.id,
+            "title": row.title,
+            "content": row.content,
+            "owner_id": row.owner_id,
+            "created_at": row.created_at.isoformat(),
+            "updated_at": row.updated_at.isoformat(),
+        }
+    ) + "\n"
+
 JWT_SECRET = os.getenv("JWT_SECRET")
 if not JWT_SECRET:
     raise RuntimeError(
@@ -20,46 +98,276 @@ if not JWT_SECRET:
 
 
 class BlogServicesClass:
+    # the HTML ETag also changes with the renderer, the markdown one keeps its old parts
+    @staticmethod
+    def blog_validators(blog_id: int, updated_at, format: blogs_schema.BlogFormat = "markdown") -> Validators:
+        if format == "html":
+            return Validators(make_etag("blog", blog_id, updated_at, format, RENDERER_VERSION), updated_at)
+        return Validators(make_etag("blog", blog_id, updated_at), updated_at)
+
+    # ETag and Last-Modified of one blog, read without loading its content
     @staticmethod
     @handle_exceptions
-    async def get_one_blog_from_current_user(blog_id: int, user: users_schema.User, db: Session) -> blogs_schema.Blog:
-        blog = get_or_404(Blog, db, id=blog_id)
+    async def get_blog_validators(
+        blog_id: int, user: users_schema.User, db: AsyncSession, format: blogs_schema.BlogFormat = "markdown"
+    ) -> Validators:
+        row = (
+            await db.execute(select(Blog.owner_id, Blog.updated_at).where(Blog.id == blog_id))
+        ).first()
+        if not row:
+            handle_exception(404, "Blog not found")
+        authorize_user(user, row.owner_id)
+        return BlogServicesClass.blog_validators(blog_id, row.updated_at, format)
+
+    # a list page is described by the (id, updated_at) of its own rows, read
+    # with the same keyset seek as the page but without content. the extra
+    # row of the next page covers next_cursor. cost stays one page however
+    # many blogs there are, unlike count() or max() over the table
+    @staticmethod
+    @handle_exceptions
+    async def get_blogs_validators(
+        db: AsyncSession,
+        cursor: str | None,
+        limit: int,
+        owner_id: int | None = None,
+        view: blogs_schema.BlogListView = "summary",
+    ) -> Validators:
+        stmt = select(Blog.id, Blog.updated_at)
+        if owner_id is not None:
+            stmt = stmt.where(Blog.owner_id == owner_id)
+        rows = [tuple(row) for row in await db.execute(keyset_page(stmt, Blog.created_at, Blog.id, cursor, limit))]
+        last_modified = max((row[1] for row in rows), default=None)
+        return Validators(
+            make_etag("blogs", owner_id, view, cursor, limit, rows), last_modified
+        )
+
+    @staticmethod
+    @handle_exceptions
+    async def get_one_blog_from_current_user(
+        blog_id: int, user: users_schema.User, db: AsyncSession, format: blogs_schema.BlogFormat = "markdown"
+    ) -> blogs_schema.Blog | blogs_schema.BlogHtml:
+        if format == "html":
+            blog = await db.scalar(select(Blog).options(undefer(Blog.content_html)).where(Blog.id == blog_id))
+            if not blog:
+                handle_exception(404, "Blog not found")
+            authorize_user(user, blog.owner_id)
+            return blog_html(blog)
+
+        blog = await get_or_404(Blog, db, id=blog_id)
         authorize_user(user, blog.owner_id)
         return blog
 
+    # summaries of the `limit` most viewed blogs, straight off ix_blogs_view_count_id
+    @staticmethod
+    @handle_exceptions
+    async def get_most_viewed_blogs(db: AsyncSession, limit: int) -> list[Blog]:
+        stmt = (
+            blog_list_query("summary", Blog.view_count)
+            .order_by(Blog.view_count.desc(), Blog.id.desc())
+            .limit(limit)
+        )
+        return list((await db.scalars(stmt)).all())
+
+    # stored views of one blog plus those recorded since the last flush
     @staticmethod
     @handle_exceptions
-    async def create_blog(user: users_schema.User, db: Session, blog: blogs_schema.BlogCreate) -> Blog:
-        blog_obj = Blog(**blog.model_dump(), owner_id=user.id)
+    async def get_blog_views(blog_id: int, user: users_schema.User, db: AsyncSession) -> blogs_schema.BlogViews:
+        row = (await db.execute(select(Blog.owner_id, Blog.view_count).where(Blog.id == blog_id))).first()
+        if not row:
+            handle_exception(404, "Blog not found")
+        authorize_user(user, row.owner_id)
+        return blogs_schema.BlogViews(id=blog_id, view_count=row.view_count + view_counter.pending(blog_id))
+
+    @staticmethod
+    @handle_exceptions
+    async def create_blog(user: users_schema.User, db: AsyncSession, blog: blogs_schema.BlogCreate) -> Blog:
+        # rendered once here instead of by every client on every read
+        blog_obj = Blog(**blog.model_dump(exclude={"tags"}), **html_values(blog.content), owner_id=user.id)
         db.add(blog_obj)
-        db.commit()
-        db.refresh(blog_obj)
+        await db.flush()
+        await SearchServicesClass.index_blog(db, blog_obj)
+        if blog.tags:
+            await TagServicesClass.add_tags(db, {blog_obj.id: set(blog.tags)})
+        await db.commit()
+        await db.refresh(blog_obj)
         return blog_obj
 
     @staticmethod
     @handle_exceptions
-    async def update_blog(blog: blogs_schema.BlogUpdate, blog_id: int, user: users_schema.User, db: Session) -> Blog: 
-        blog_obj = get_or_404(Blog, db, id=blog_id)
+    async def update_blog(blog: blogs_schema.BlogUpdate, blog_id: int, user: users_schema.User, db: AsyncSession) -> Blog: 
+        blog_obj = await get_or_404(Blog, db, id=blog_id)
         authorize_user(user, blog_obj.owner_id)
-        for key, value in blog.model_dump().items():
+        # before the new values are set, the index needs the old ones
+        await SearchServicesClass.reindex_blog(db, blog_obj, blog.title, blog.content)
+        for key, value in {**blog.model_dump(exclude={"tags"}), **html_values(blog.content)}.items():
             setattr(blog_obj, key, value)
-        db.commit()
-        db.refresh(blog_obj)
+        if blog.tags is not None:
+            await TagServicesClass.sync_blog_tags(db, blog_id, set(blog.tags))
+        await db.commit()
+        PublicBlogServicesClass.invalidate(blog_id)
+        await db.refresh(blog_obj)
         return blog_obj
 
     @staticmethod
     @handle_exceptions
-    async def delete_blog(blog_id: int, user: users_schema.User, db: Session) -> dict | None:
-        blog_obj = get_or_404(Blog, db, id=blog_id)
+    async def delete_blog(blog_id: int, user: users_schema.User, db: AsyncSession) -> dict | None:
+        blog_obj = await get_or_404(Blog, db, id=blog_id)
         authorize_user(user, blog_obj.owner_id)
-        db.delete(blog_obj)
-        db.commit()
+        await SearchServicesClass.remove_blog(db, blog_obj)
+        await TagServicesClass.remove_blogs(db, [blog_obj.id])
+        await db.delete(blog_obj)
+        await db.commit()
+        PublicBlogServicesClass.invalidate(blog_id)
         return {}
 
+    # Bulk variants: one ownership query for the whole set, executemany writes
+    # in chunks, a single commit, and one result per requested item
+
+    @staticmethod
+    @handle_exceptions
+    async def create_blogs_bulk(
+        user: users_schema.User, db: AsyncSession, blogs: list[blogs_schema.BlogCreate]
+    ) -> list[blogs_schema.BlogBulkResult]:
+        results = []
+        for chunk in _chunks(blogs):
+            rows = [
+                {**blog.model_dump(exclude={"tags"}), **html_values(blog.content), "owner_id": user.id}
+                for blog in chunk
+            ]
+            ids = (
+                await db.execute(
+                    insert(Blog.__table__).returning(Blog.__table__.c.id, sort_by_parameter_order=True),
+                    rows,
+                )
+            ).scalars().all()
+            await SearchServicesClass.index_blogs(
+                db, [{**row, "id": blog_id} for row, blog_id in zip(rows, ids)]
+            )
+            await TagServicesClass.add_tags(
+                db, {blog_id: set(blog.tags) for blog, blog_id in zip(chunk, ids) if blog.tags}
+            )
+            results.extend(
+                blogs_schema.BlogBulkResult(index=index, id=blog_id, status=201)
+                for index, blog_id in enumerate(ids, start=len(results))
+            )
+        await db.commit()
+        return results
+
+    # ids the user may not touch, mapped to the status each of them gets
+    @staticmethod
+    async def _check_bulk_ownership(
+        user: users_schema.User, db: AsyncSession, blog_ids: list[int]
+    ) -> dict[int, tuple[int, str]]:
+        owners = dict(
+            (await db.execute(select(Blog.id, Blog.owner_id).where(Blog.id.in_(set(blog_ids))))).all()
+        )
+        rejected = {}
+        for blog_id in blog_ids:
+            if blog_id not in owners:
+                rejected[blog_id] = (404, "Blog not found")
+            elif owners[blog_id] != user.id:
+                rejected[blog_id] = (401, "Unauthorized")
+        return rejected
+
+    @staticmethod
+    @handle_exceptions
+    async def update_blogs_bulk(
+        user: users_schema.User, db: AsyncSession, blogs: list[blogs_schema.BlogBulkUpdate]
+    ) -> list[blogs_schema.BlogBulkResult]:
+        rejected = await BlogServicesClass._check_bulk_ownership(user, db, [b.id for b in blogs])
+        now = datetime.utcnow()
+        accepted = [
+            {"id": blog.id, "title": blog.title, "content": blog.content, **html_values(blog.content), "updated_at": now}
+            for blog in blogs
+            if blog.id not in rejected
+        ]
+        for chunk in _chunks(accepted):
+            await SearchServicesClass.reindex_blogs(db, chunk)
+            # ORM bulk UPDATE by primary key, run as one executemany
+            await db.execute(update(Blog), chunk)
+        await db.commit()
+        PublicBlogServicesClass.invalidate(*(blog["id"] for blog in accepted))
+
+        return [
+            blogs_schema.BlogBulkResult(
+                index=index,
+                id=blog.id,
+                status=rejected.get(blog.id, (200, None))[0],
+                detail=rejected.get(blog.id, (200, None))[1],
+            )
+            for index, blog in enumerate(blogs)
+        ]
+
     @staticmethod
     @handle_exceptions
-    async def get_all_blogs(db: Session) -> list[blogs_schema.Blog]:
-        blogs = db.query(Blog).all()
-        if not blogs:
+    async def delete_blogs_bulk(
+        user: users_schema.User, db: AsyncSession, blog_ids: list[int]
+    ) -> list[blogs_schema.BlogBulkResult]:
+        rejected = await BlogServicesClass._check_bulk_ownership(user, db, blog_ids)
+        accepted = list(dict.fromkeys(i for i in blog_ids if i not in rejected))
+        for chunk in _chunks(accepted):
+            await SearchServicesClass.remove_blogs(db, chunk)
+            await TagServicesClass.remove_blogs(db, chunk)
+            await db.execute(delete(Blog.__table__).where(Blog.__table__.c.id.in_(chunk)))
+        await db.commit()
+        PublicBlogServicesClass.invalidate(*accepted)
+
+        return [
+            blogs_schema.BlogBulkResult(
+                index=index,
+                id=blog_id,
+                status=rejected.get(blog_id, (204, None))[0],
+                detail=rejected.get(blog_id, (204, None))[1],
+            )
+            for index, blog_id in enumerate(blog_ids)
+        ]
+
+    @staticmethod
+    @handle_exceptions
+    async def get_all_blogs(
+        db: AsyncSession, cursor: str | None, limit: int, view: blogs_schema.BlogListView = "summary"
+    ) -> Page:
+        blogs, next_cursor = await paginate(
+            db, blog_list_query(view), Blog.created_at, Blog.id, cursor, limit
+        )
+        if not blogs and not cursor:
             handle_exception(404, "No blogs found")
-        return [blogs_schema.Blog.model_validate(blog) for blog in blogs]
\ No newline at end of file
+        # items stay ORM rows, the router validates them once while encoding
+        return Page(items=blogs, next_cursor=next_cursor)
+
+    # NDJSON export through a server-side cursor: only one batch of rows is held
+    # in memory at a time. Opens its own session because the stream outlives
+    # the request's dependencies.
+    @staticmethod
+    async def export_blogs(
+        owner_id: int | None, updated_since: datetime | None
+    ) -> AsyncIterator[str]:
+        stmt = _export_query(owner_id, updated_since)
+        async with ReadSessionLocal() as db:
+            result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                yield "".join(map(_export_line, rows))
+
+    # Same rows in keyset batches, each read in its own short transaction, so the
+    # consumer may write to the database between batches without deadlocking on
+    # its own open read (background export jobs report progress that way)
+    @staticmethod
+    async def export_blogs_in_batches(
+        owner_id: int | None, updated_since: datetime | None
+    ) -> AsyncIterator[str]:
+        stmt = _export_query(owner_id, updated_since)
+        last_id = 0
+        while True:
+            async with ReadSessionLocal() as db:
+                rows = (await db.execute(stmt.where(Blog.id > last_id).limit(EXPORT_BATCH_SIZE))).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield "".join(map(_export_line, rows))
+
+    @staticmethod
+    @handle_exceptions
+    async def count_export_rows(owner_id: int | None, updated_since: datetime | None) -> int:
+        stmt = _export_query(owner_id, updated_since).order_by(None)
+        async with ReadSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(stmt.subquery()))
@@ -2,15 +2,28 @@
 from dependencies.database import Base, engine
 
 
-def create_database():
+async def create_database():
     from models.blogs_models import Blog
     from models.users_models import User
     from models.admins_models import Admin
+    from models.jobs_models import Job
+    from models.tokens_models import RefreshToken
+    from models.tags_models import Tag
 
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # create_all skips tables that already exist, so add indexes declared since
+        await conn.run_sync(create_missing_indexes)
+
+
+def create_missing_indexes(conn) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
 
 # in terminal add:
 #  cd backend
 #  python
+#  import asyncio
 #  from services import create_database_service
-#  create_database_service.create_database()
+#  asyncio.run(create_database_service.create_database())
@@ -1,9 +1,12 @@
-from dependencies.database import SessionLocal
+from dependencies.database import SessionLocal, ReadSessionLocal
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+
+# for GET-only routes, served by the read-only pool in the production profile
+async def get_read_db():
+    async with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from dependencies.database import SessionLocal
+from models.jobs_models import Job
+
+
+# handed to a job handler so it can report how far it got
+class JobContext:
+    # progress is written at most this often, every write takes the database's write lock
+    REPORT_INTERVAL_SECONDS = 0.5
+
+    def __init__(self, job_id: int) -> None:
+        self.job_id = job_id
+        self._last_report = 0.0
+
+    async def report(self, progress: int, total: int | None = None, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_report < self.REPORT_INTERVAL_SECONDS:
+            return
+        self._last_report = now
+        values = {"progress": progress, "updated_at": datetime.utcnow()}
+        if total is not None:
+            values["total"] = total
+        async with SessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            await db.commit()
+
+
+JobHandler = Callable[[dict, JobContext], Awaitable[Any]]
+
+
+# a pool of asyncio workers that run the jobs table in the app's own process.
+# jobs are claimed with a conditional UPDATE, so several app processes sharing
+# the database never run the same job twice
+class JobRunner:
+    def __init__(
+        self,
+        handlers: dict[str, JobHandler],
+        workers: int,
+        poll_seconds: float,
+        retry_delay_seconds: float,
+        stale_seconds: float,
+    ) -> None:
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.retry_delay_seconds = retry_delay_seconds
+        self.stale_seconds = stale_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        try:
+            await self.requeue_stale()
+        except Exception as e:
+            # e.g. the jobs table was not created yet, the workers keep retrying on their own
+            print(f"Job maintenance error: {e}")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance()))
+
+    # cancels the workers, a job cut off mid-run goes back to the queue
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # wake an idle worker instead of waiting for the next poll
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    # runs queued jobs until nothing is due, for scripts and benchmarks without the app lifespan
+    async def drain(self) -> None:
+        while await self.run_next():
+            pass
+
+    async def run_next(self) -> bool:
+        job = await self._claim()
+        if job is None:
+            return False
+        await self._execute(job)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                if await self.run_next():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job worker error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _maintenance(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_seconds / 2)
+            try:
+                await self.requeue_stale()
+            except Exception as e:
+                print(f"Job maintenance error: {e}")
+
+    # jobs left running by a crashed process stop heartbeating and are picked up again
+    async def requeue_stale(self) -> None:
+        now = datetime.utcnow()
+        async with SessionLocal() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.status == "running", Job.updated_at < now - timedelta(seconds=self.stale_seconds))
+                .values(status="queued", run_after=now, updated_at=now)
+            )
+            await db.commit()
+
+    async def _claim(self) -> Job | None:
+        now = datetime.utcnow()
+        async with SessionLocal() as db:
+            # a plain read first, an idle poll should not take the write lock
+            job_id = await db.scalar(
+                select(Job.id)
+                .where(Job.status == "queued", Job.run_after <= now)
+                .order_by(Job.run_after, Job.id)
+                .limit(1)
+            )
+            if job_id is None:
+                return None
+            job = await db.scalar(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", attempts=Job.attempts + 1, updated_at=now)
+                .returning(Job)
+            )
+            await db.commit()
+            # another worker won the race, let the caller look again
+            if job is None:
+                return await self._claim()
+            return job
+
+    async def _execute(self, job: Job) -> None:
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await self._finish(job.id, status="failed", error=f"Unknown job kind: {job.kind}")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            result = await handler(job.payload, JobContext(job.id))
+        except asyncio.CancelledError:
+            await self._finish(job.id, status="queued", attempts=job.attempts - 1)
+            raise
+        except Exception as e:
+            await self._failed(job, e)
+        else:
+            await self._finish(job.id, status="succeeded", result=result, error=None)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.stale_seconds / 4)
+            async with SessionLocal() as db:
+                await db.execute(update(Job).where(Job.id == job_id).values(updated_at=datetime.utcnow()))
+                await db.commit()
+
+    # 4xx errors are final, anything else is retried with a doubling delay
+    async def _failed(self, job: Job, error: Exception) -> None:
+        if isinstance(error, HTTPException):
+            detail, retryable = str(error.detail), error.status_code >= 500
+        else:
+            detail, retryable = str(error), True
+
+        if retryable and job.attempts < job.max_attempts:
+            delay = self.retry_delay_seconds * 2 ** (job.attempts - 1)
+            await self._finish(
+                job.id,
+                status="queued",
+                error=detail,
+                run_after=datetime.utcnow() + timedelta(seconds=delay),
+            )
+        else:
+            await self._finish(job.id, status="failed", error=detail)
+
+    async def _finish(self, job_id: int, status: str, **values) -> None:
+        now = datetime.utcnow()
+        if status in ("succeeded", "failed"):
+            values["finished_at"] = now
+        async with SessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == job_id).values(status=status, updated_at=now, **values))
+            await db.commit()
@@ -0,0 +1,161 @@
+import asyncio
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+from fastapi import Depends, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.security import OAuth2PasswordBearer
+from jwt import PyJWTError, decode, ExpiredSignatureError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dependencies.database import SessionLocal
+from exceptions.handlers import handle_exception
+from models.jobs_models import Job
+from models.users_models import User
+from schemas import jobs_schema
+from services.blog_service import BlogServicesClass
+from services.job_runner import JobContext, JobRunner
+from services.user_service import UserServicesClass
+from utils.services_utils import get_or_404, handle_exceptions
+from utils.serialization_utils import json_response
+
+load_dotenv()
+
+JWT_SECRET = os.getenv("JWT_SECRET")
+ALGORITHM = os.getenv("ALGORITHM")
+
+# concurrent jobs per app process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# how often an idle worker looks for due jobs (retries, jobs queued by other processes)
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# delay before the first retry, doubled for every attempt after it
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "2"))
+# a running job that has not heartbeated for this long is requeued
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+# where export jobs write their NDJSON files
+JOB_EXPORT_DIR = os.getenv("JOB_EXPORT_DIR", "./exports")
+
+# both user and admin tokens are accepted, the job remembers which kind created it
+job_oauth2_scheme = OAuth2PasswordBearer("/api/1/users/token")
+
+
+def export_path(job_id: int) -> str:
+    return os.path.join(JOB_EXPORT_DIR, f"job-{job_id}.ndjson")
+
+
+# Job handlers, each opens its own session like any request would
+
+async def run_delete_user(payload: dict, context: JobContext) -> dict:
+    async with SessionLocal() as db:
+        user = await get_or_404(User, db, id=payload["user_id"])
+        await UserServicesClass.delete_user(db=db, user=user)
+    await context.report(1, total=1, force=True)
+    return {"user_id": payload["user_id"]}
+
+
+async def run_delete_blogs_bulk(payload: dict, context: JobContext) -> list[dict]:
+    async with SessionLocal() as db:
+        user = await get_or_404(User, db, id=payload["owner_id"])
+        results = await BlogServicesClass.delete_blogs_bulk(user=user, db=db, blog_ids=payload["blog_ids"])
+    await context.report(len(results), total=len(results), force=True)
+    return jsonable_encoder(results)
+
+
+# rerunning the job rewrites the file from scratch, so retries are safe
+async def run_export_blogs(payload: dict, context: JobContext) -> dict:
+    owner_id = payload.get("owner_id")
+    updated_since = payload.get("updated_since")
+    updated_since = datetime.fromisoformat(updated_since) if updated_since else None
+
+    total = await BlogServicesClass.count_export_rows(owner_id=owner_id, updated_since=updated_since)
+    await context.report(0, total=total, force=True)
+
+    # every file operation runs in a thread, a slow disk must not stall the
+    # requests served by the same event loop
+    await asyncio.to_thread(os.makedirs, JOB_EXPORT_DIR, exist_ok=True)
+    rows = 0
+    file = await asyncio.to_thread(open, export_path(context.job_id), "w", encoding="utf-8")
+    try:
+        async for chunk in BlogServicesClass.export_blogs_in_batches(
+            owner_id=owner_id, updated_since=updated_since
+        ):
+            await asyncio.to_thread(file.write, chunk)
+            rows += chunk.count("\n")
+            await context.report(rows)
+    finally:
+        await asyncio.to_thread(file.close)
+    await context.report(rows, total=rows, force=True)
+    return {"rows": rows}
+
+
+JOB_HANDLERS = {
+    "delete_user": run_delete_user,
+    "delete_blogs_bulk": run_delete_blogs_bulk,
+    "export_blogs": run_export_blogs,
+}
+
+job_runner = JobRunner(
+    JOB_HANDLERS,
+    workers=JOB_WORKERS,
+    poll_seconds=JOB_POLL_SECONDS,
+    retry_delay_seconds=JOB_RETRY_DELAY_SECONDS,
+    stale_seconds=JOB_STALE_SECONDS,
+)
+
+
+class JobServicesClass:
+    # Queue a job and wake a worker
+    @staticmethod
+    @handle_exceptions
+    async def enqueue(
+        kind: str, payload: dict, owner_id: int, owner_is_admin: bool, db: AsyncSession
+    ) -> Job:
+        job = await db.scalar(
+            insert(Job)
+            .values(
+                kind=kind,
+                payload=jsonable_encoder(payload),
+                owner_id=owner_id,
+                owner_is_admin=owner_is_admin,
+                max_attempts=JOB_MAX_ATTEMPTS,
+            )
+            .returning(Job)
+        )
+        await db.commit()
+        job_runner.notify()
+        return job
+
+    # 202 answer of an endpoint that handed its work to a job
+    @staticmethod
+    def accepted(job: Job) -> Response:
+        return json_response(
+            jobs_schema.Job, job, status_code=202, headers={"Location": f"/api/1/jobs/{job.id}"}
+        )
+
+    # (id, is_admin) from the token claims alone, a delete_user job must stay
+    # visible after the account it deleted is gone
+    @staticmethod
+    async def get_job_owner(token: str = Depends(job_oauth2_scheme)) -> tuple[int, bool]:
+        try:
+            payload = decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+        except ExpiredSignatureError:
+            raise handle_exception(401, "Token expired")
+        except PyJWTError:
+            raise handle_exception(401, "Invalid token")
+
+        owner_id = payload.get("id")
+        if not owner_id:
+            handle_exception(401, "Invalid token: Missing user ID")
+        return owner_id, bool(payload.get("is_admin"))
+
+    # Get a job of the caller
+    @staticmethod
+    @handle_exceptions
+    async def get_job(job_id: int, owner: tuple[int, bool], db: AsyncSession) -> Job:
+        job = await get_or_404(Job, db, id=job_id)
+        if (job.owner_id, job.owner_is_admin) != owner:
+            handle_exception(401, "Unauthorized")
+        return job
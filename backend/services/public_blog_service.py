@@ -0,0 +1,75 @@
+import os
+import time
+from typing import NamedTuple, get_args
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from dependencies.database import ReadSessionLocal
+from models.blogs_models import Blog
+from schemas.blogs_schema import BlogFormat
+from exceptions.handlers import handle_exception
+from utils.cache_utils import SingleFlightCache
+from utils.conditional_utils import Validators
+from utils.metrics_utils import record_cache_read
+from utils.serialization_utils import encode_response
+
+load_dotenv()
+
+PUBLIC_BLOG_CACHE_SIZE = int(os.getenv("PUBLIC_BLOG_CACHE_SIZE", "1000"))
+PUBLIC_BLOG_CACHE_MAX_BYTES = int(os.getenv("PUBLIC_BLOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# the cache is per process: this bounds how long a change made through another
+# worker can go unseen, changes made through this one invalidate at once
+PUBLIC_BLOG_CACHE_TTL_SECONDS = float(os.getenv("PUBLIC_BLOG_CACHE_TTL_SECONDS", "30"))
+
+
+# a blog's response body in one format, encoded once and served as is until it changes
+class CachedBlog(NamedTuple):
+    body: bytes
+    validators: Validators
+    owner_id: int
+
+
+public_blog_cache = SingleFlightCache(
+    PUBLIC_BLOG_CACHE_SIZE, PUBLIC_BLOG_CACHE_MAX_BYTES, PUBLIC_BLOG_CACHE_TTL_SECONDS
+)
+
+
+class PublicBlogServicesClass:
+    # the load runs in its own session, it may outlive the request that started it
+    @staticmethod
+    async def _load(blog_id: int, format: BlogFormat) -> tuple[CachedBlog, int]:
+        # blog_service invalidates this cache, importing it at the top would be circular
+        from services.blog_service import BlogServicesClass, blog_html, blog_shape
+
+        async with ReadSessionLocal() as db:
+            stmt = select(Blog).where(Blog.id == blog_id)
+            if format == "html":
+                stmt = stmt.options(undefer(Blog.content_html))
+            blog = await db.scalar(stmt)
+            if not blog:
+                handle_exception(404, "Blog not found")
+            body = encode_response(blog_shape(format), blog_html(blog) if format == "html" else blog)
+        # the same ETag as the owner's GET /blogs/{blog_id}
+        validators = BlogServicesClass.blog_validators(blog.id, blog.updated_at, format)
+        return CachedBlog(body, validators, blog.owner_id), len(body)
+
+    @staticmethod
+    async def get_blog(blog_id: int, format: BlogFormat = "markdown") -> CachedBlog:
+        start = time.perf_counter()
+        cached, outcome = await public_blog_cache.get_or_load(
+            (blog_id, format), lambda: PublicBlogServicesClass._load(blog_id, format)
+        )
+        record_cache_read("public_blogs", outcome, time.perf_counter() - start)
+        return cached
+
+    @staticmethod
+    def invalidate(*blog_ids: int) -> None:
+        for blog_id in blog_ids:
+            for format in get_args(BlogFormat):
+                public_blog_cache.invalidate((blog_id, format))
+
+    @staticmethod
+    def invalidate_owner(owner_id: int) -> None:
+        public_blog_cache.invalidate_where(lambda cached: cached.owner_id == owner_id)
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.tokens_models import RefreshToken
+from exceptions.handlers import handle_exception
+from utils.services_utils import handle_exceptions
+
+load_dotenv()
+
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _subject(subject_id: int, is_admin: bool):
+    return (RefreshToken.subject_id == subject_id) & (RefreshToken.subject_is_admin == is_admin)
+
+
+# long-lived opaque tokens that are traded for a new access token and a new
+# refresh token (rotation). a token that was already traded in being shown
+# again means it leaked, so its whole family is revoked
+class RefreshTokenServicesClass:
+    @staticmethod
+    async def _insert(db: AsyncSession, subject_id: int, is_admin: bool, family_id: str, now: datetime) -> str:
+        token = secrets.token_urlsafe(32)
+        await db.execute(
+            insert(RefreshToken).values(
+                token_hash=hash_refresh_token(token),
+                family_id=family_id,
+                subject_id=subject_id,
+                subject_is_admin=is_admin,
+                created_at=now,
+                expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            )
+        )
+        return token
+
+    # first token of a new family, issued on a password login. expired tokens
+    # of the account are dropped here so the table does not grow without bound
+    @staticmethod
+    @handle_exceptions
+    async def issue(db: AsyncSession, subject_id: int, is_admin: bool) -> str:
+        now = datetime.utcnow()
+        await db.execute(
+            delete(RefreshToken).where(_subject(subject_id, is_admin), RefreshToken.expires_at < now)
+        )
+        token = await RefreshTokenServicesClass._insert(db, subject_id, is_admin, secrets.token_hex(16), now)
+        await db.commit()
+        return token
+
+    # trades `token` for its successor, returns (subject id, successor)
+    @staticmethod
+    @handle_exceptions
+    async def rotate(db: AsyncSession, token: str, is_admin: bool) -> tuple[int, str]:
+        now = datetime.utcnow()
+        # claiming the row and checking it is one conditional UPDATE, so two
+        # concurrent refreshes with the same token cannot both succeed
+        claimed = (
+            await db.execute(
+                update(RefreshToken)
+                .where(
+                    RefreshToken.token_hash == hash_refresh_token(token),
+                    RefreshToken.subject_is_admin == is_admin,
+                    RefreshToken.used_at.is_(None),
+                    RefreshToken.revoked_at.is_(None),
+                    RefreshToken.expires_at > now,
+                )
+                .values(used_at=now)
+                .returning(RefreshToken.subject_id, RefreshToken.family_id)
+            )
+        ).first()
+
+        if claimed is None:
+            await RefreshTokenServicesClass._revoke_if_reused(db, token, is_admin, now)
+            handle_exception(401, "Invalid refresh token")
+
+        successor = await RefreshTokenServicesClass._insert(db, claimed.subject_id, is_admin, claimed.family_id, now)
+        await db.commit()
+        return claimed.subject_id, successor
+
+    # revokes every token of the family `token` belongs to, if it is one of `condition`
+    @staticmethod
+    async def _revoke_family(db: AsyncSession, token: str, is_admin: bool, now: datetime, *condition) -> None:
+        family = (
+            select(RefreshToken.family_id)
+            .where(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                RefreshToken.subject_is_admin == is_admin,
+                *condition,
+            )
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+        await db.commit()
+
+    # a token that exists but was already traded in or revoked is a replay
+    @staticmethod
+    async def _revoke_if_reused(db: AsyncSession, token: str, is_admin: bool, now: datetime) -> None:
+        await RefreshTokenServicesClass._revoke_family(
+            db, token, is_admin, now, RefreshToken.used_at.is_not(None) | RefreshToken.revoked_at.is_not(None)
+        )
+
+    # logout: revokes the family of `token`, an unknown token is ignored
+    @staticmethod
+    @handle_exceptions
+    async def revoke(db: AsyncSession, token: str, is_admin: bool) -> dict:
+        await RefreshTokenServicesClass._revoke_family(db, token, is_admin, datetime.utcnow())
+        return {}
+
+    # every token of an account, for account deletion; the caller commits
+    @staticmethod
+    async def delete_all(db: AsyncSession, subject_id: int, is_admin: bool) -> None:
+        await db.execute(delete(RefreshToken).where(_subject(subject_id, is_admin)))
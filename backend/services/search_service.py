@@ -0,0 +1,166 @@
+import re
+import unicodedata
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.blogs_models import Blog
+from schemas.pagination_schema import Page
+
+from exceptions.handlers import handle_exception
+from utils.services_utils import handle_exceptions
+from utils.pagination_utils import encode_key, decode_key
+
+
+# quote every term so user input can never be parsed as FTS5 query syntax,
+# the terms are then implicitly AND-ed
+def build_match_query(q: str) -> str:
+    terms = [term.replace('"', '""') for term in q.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+# blogs_fts is contentless: it keeps no copy of the text, so removing a row
+# means handing FTS5 back the exact values it indexed, read from blogs
+FTS_INSERT = text("INSERT INTO blogs_fts (rowid, title, content) VALUES (:id, :title, :content)")
+FTS_DELETE = text(
+    "INSERT INTO blogs_fts (blogs_fts, rowid, title, content) VALUES ('delete', :id, :title, :content)"
+)
+# rows read per batch when removing every blog of an owner
+FTS_DELETE_BATCH_SIZE = 1000
+# words around the first hit in a search snippet
+SNIPPET_TOKENS = 16
+
+# close to FTS5's unicode61 tokenizer with remove_diacritics 2
+TOKEN = re.compile(r"[^\W_]+")
+
+
+def _fold(token: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", token.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _fts_row(blog_id: int, title: str | None, content: str | None) -> dict:
+    return {"id": blog_id, "title": title or "", "content": content or ""}
+
+
+# snippet() needs the indexed text, which a contentless table does not have.
+# the same window is cut here from the decompressed body: SNIPPET_TOKENS words
+# around the first one matching a query term, matches wrapped in <b></b>
+def make_snippet(content: str | None, q: str, tokens: int = SNIPPET_TOKENS) -> str:
+    words = list(TOKEN.finditer(content or ""))
+    if not words:
+        return ""
+    terms = {_fold(term) for term in TOKEN.findall(q)}
+    hits = {index for index, word in enumerate(words) if _fold(word.group()) in terms}
+    first = max(0, min(min(hits, default=0) - tokens // 4, len(words) - tokens))
+    last = min(len(words), first + tokens)
+
+    parts = ["..."] if first > 0 else []
+    position = words[first].start()
+    for index in range(first, last):
+        word = words[index]
+        parts.append(content[position:word.start()])
+        parts.append(f"<b>{word.group()}</b>" if index in hits else word.group())
+        position = word.end()
+    if last < len(words):
+        parts.append("...")
+    return "".join(parts)
+
+
+class SearchServicesClass:
+    # the helpers below run inside the caller's transaction, before its commit.
+    # the ones that change or remove rows must run before blogs is written, so
+    # that they still read the values that were indexed
+
+    @staticmethod
+    async def _unindex(db: AsyncSession, where) -> None:
+        rows = (await db.execute(select(Blog.id, Blog.title, Blog.content).where(where))).all()
+        if rows:
+            await db.execute(FTS_DELETE, [_fts_row(*row) for row in rows])
+
+    @staticmethod
+    async def index_blog(db: AsyncSession, blog: Blog) -> None:
+        await db.execute(FTS_INSERT, _fts_row(blog.id, blog.title, blog.content))
+
+    # `blog` still holds the indexed values
+    @staticmethod
+    async def reindex_blog(db: AsyncSession, blog: Blog, title: str, content: str) -> None:
+        await db.execute(FTS_DELETE, _fts_row(blog.id, blog.title, blog.content))
+        await db.execute(FTS_INSERT, _fts_row(blog.id, title, content))
+
+    @staticmethod
+    async def remove_blog(db: AsyncSession, blog: Blog) -> None:
+        await db.execute(FTS_DELETE, _fts_row(blog.id, blog.title, blog.content))
+
+    @staticmethod
+    async def index_blogs(db: AsyncSession, rows: list[dict]) -> None:
+        if rows:
+            await db.execute(FTS_INSERT, [_fts_row(row["id"], row["title"], row["content"]) for row in rows])
+
+    @staticmethod
+    async def reindex_blogs(db: AsyncSession, rows: list[dict]) -> None:
+        # an id listed twice ends up with its last values, as in the UPDATE
+        rows = list({row["id"]: row for row in rows}.values())
+        if rows:
+            await SearchServicesClass._unindex(db, Blog.id.in_([row["id"] for row in rows]))
+            await SearchServicesClass.index_blogs(db, rows)
+
+    @staticmethod
+    async def remove_blogs(db: AsyncSession, blog_ids: list[int]) -> None:
+        if blog_ids:
+            await SearchServicesClass._unindex(db, Blog.id.in_(blog_ids))
+
+    # streamed in batches, the owner's bodies are never all in memory at once
+    @staticmethod
+    async def remove_blogs_of_owner(db: AsyncSession, owner_id: int) -> None:
+        stmt = select(Blog.id, Blog.title, Blog.content).where(Blog.owner_id == owner_id)
+        result = await db.stream(stmt.execution_options(yield_per=FTS_DELETE_BATCH_SIZE))
+        async for rows in result.partitions():
+            await db.execute(FTS_DELETE, [_fts_row(*row) for row in rows])
+
+    # ranked by bm25 (lower is better), paginated on (rank, id)
+    @staticmethod
+    @handle_exceptions
+    async def search_blogs(
+        q: str, db: AsyncSession, cursor: str | None, limit: int
+    ) -> Page:
+        match = build_match_query(q)
+        if not match:
+            handle_exception(400, "Search query is empty")
+
+        after = ""
+        params = {"match": match, "limit": limit + 1}
+        if cursor:
+            try:
+                rank, row_id = decode_key(cursor)
+                params["rank"], params["id"] = float(rank), int(row_id)
+            except (TypeError, ValueError):
+                handle_exception(400, "Invalid cursor")
+            after = "AND (bm25(blogs_fts), blogs_fts.rowid) > (:rank, :id)"
+
+        rows = (
+            await db.execute(
+                text(
+                    "SELECT blogs.id, blogs.title, blogs.owner_id, blogs.created_at, blogs.updated_at, "
+                    "blogs.content, bm25(blogs_fts) AS rank "
+                    "FROM blogs_fts JOIN blogs ON blogs.id = blogs_fts.rowid "
+                    f"WHERE blogs_fts MATCH :match {after} "
+                    "ORDER BY rank, blogs.id LIMIT :limit"
+                ).columns(
+                    created_at=Blog.created_at.type, updated_at=Blog.updated_at.type, content=Blog.content.type
+                ),
+                params,
+            )
+        ).mappings().all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_key(rows[-1]["rank"], rows[-1]["id"])
+
+        # items stay plain dicts, the router validates them once while encoding
+        items = [
+            {**{key: value for key, value in row.items() if key != "content"}, "snippet": make_snippet(row["content"], q)}
+            for row in rows
+        ]
+        return Page(items=items, next_cursor=next_cursor)
@@ -0,0 +1,163 @@
+from collections import Counter
+
+from sqlalchemy import and_, delete, exists, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.blogs_models import Blog
+from models.tags_models import Tag, blog_tags
+from schemas import blogs_schema
+from schemas.pagination_schema import Page
+
+from utils.blog_query_utils import blog_list_query
+from utils.services_utils import handle_exceptions
+from utils.pagination_utils import paginate
+
+# a tag filter matching at most this many blogs (going by tags.blog_count) is
+# looked up as a set; larger ones are checked blog by blog during the seek
+TAG_FILTER_SET_LIMIT = 1000
+
+
+# whether the blog carries one of the tags, probes of the blog_tags primary key
+def _tagged(*tag_ids: int):
+    return exists().where(blog_tags.c.blog_id == Blog.id, blog_tags.c.tag_id.in_(tag_ids))
+
+
+class TagServicesClass:
+    # the helpers below run inside the caller's transaction, before its commit,
+    # and keep tags.blog_count in step with every blog_tags row they touch
+
+    # ids of the named tags, created if missing
+    @staticmethod
+    async def _tag_ids(db: AsyncSession, names: set[str]) -> dict[str, int]:
+        if not names:
+            return {}
+        await db.execute(
+            sqlite_insert(Tag).values([{"name": name} for name in names]).on_conflict_do_nothing(index_elements=["name"])
+        )
+        return dict((await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names)))).all())
+
+    @staticmethod
+    async def _change_counts(db: AsyncSession, deltas: Counter) -> None:
+        by_delta: dict[int, list[int]] = {}
+        for tag_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(tag_id)
+        # one UPDATE per distinct delta, usually just +1 or -1
+        for delta, tag_ids in by_delta.items():
+            await db.execute(
+                update(Tag).where(Tag.id.in_(tag_ids)).values(blog_count=Tag.blog_count + delta)
+            )
+
+    # attaches to each blog its set of names, none of which it may carry yet
+    @staticmethod
+    async def add_tags(db: AsyncSession, tags_by_blog: dict[int, set[str]]) -> None:
+        tag_ids = await TagServicesClass._tag_ids(db, set().union(*tags_by_blog.values()))
+        rows = [
+            {"blog_id": blog_id, "tag_id": tag_ids[name]}
+            for blog_id, names in tags_by_blog.items()
+            for name in names
+        ]
+        if rows:
+            await db.execute(insert(blog_tags), rows)
+            await TagServicesClass._change_counts(db, Counter(row["tag_id"] for row in rows))
+
+    # makes the tags of one blog exactly `names`: only the difference between
+    # what it has and what it should have is written
+    @staticmethod
+    async def sync_blog_tags(db: AsyncSession, blog_id: int, names: set[str]) -> None:
+        current = dict(
+            (
+                await db.execute(
+                    select(Tag.name, Tag.id).join(blog_tags, blog_tags.c.tag_id == Tag.id).where(blog_tags.c.blog_id == blog_id)
+                )
+            ).all()
+        )
+        removed = [current[name] for name in current.keys() - names]
+        if removed:
+            await db.execute(
+                delete(blog_tags).where(blog_tags.c.blog_id == blog_id, blog_tags.c.tag_id.in_(removed))
+            )
+            await TagServicesClass._change_counts(db, Counter({tag_id: -1 for tag_id in removed}))
+        added = names - current.keys()
+        if added:
+            await TagServicesClass.add_tags(db, {blog_id: added})
+
+    # before deleting blogs: their blog_tags rows go through ON DELETE CASCADE,
+    # the counters are lowered here. `blog_ids` may be a list or a subquery
+    @staticmethod
+    async def remove_blogs(db: AsyncSession, blog_ids) -> None:
+        counts = (
+            select(blog_tags.c.tag_id, func.count().label("blogs"))
+            .where(blog_tags.c.blog_id.in_(blog_ids))
+            .group_by(blog_tags.c.tag_id)
+        )
+        await TagServicesClass._change_counts(db, Counter({row.tag_id: -row.blogs for row in await db.execute(counts)}))
+
+    @staticmethod
+    async def remove_blogs_of_owner(db: AsyncSession, owner_id: int) -> None:
+        await TagServicesClass.remove_blogs(db, select(Blog.id).where(Blog.owner_id == owner_id))
+
+    @staticmethod
+    @handle_exceptions
+    async def get_blog_tags(blog_id: int, db: AsyncSession) -> list[str]:
+        return list(
+            (
+                await db.scalars(
+                    select(Tag.name)
+                    .join(blog_tags, blog_tags.c.tag_id == Tag.id)
+                    .where(blog_tags.c.blog_id == blog_id)
+                    .order_by(Tag.name)
+                )
+            ).all()
+        )
+
+    # summaries of the blogs carrying all (or any) of `names`, paginated like
+    # /all/blogs. the counters bound how many blogs can match: a small set (the
+    # rarest tag for "all") is read off ix_blog_tags_tag_id_blog_id once,
+    # otherwise the keyset seek on (created_at, id) probes blog_tags per blog
+    # and stops after limit + 1 matches, so a page of a popular tag costs the
+    # same however deep it is
+    @staticmethod
+    @handle_exceptions
+    async def get_blogs_by_tags(
+        db: AsyncSession,
+        names: list[str],
+        match: blogs_schema.BlogTagMatch,
+        cursor: str | None,
+        limit: int,
+    ) -> Page:
+        names = {name.strip().lower() for name in names if name.strip()}
+        tags = dict((await db.execute(select(Tag.id, Tag.blog_count).where(Tag.name.in_(names)))).all())
+        if not tags or (match == "all" and len(tags) < len(names)):
+            return Page(items=[], next_cursor=None)
+
+        if match == "any":
+            if sum(tags.values()) <= TAG_FILTER_SET_LIMIT:
+                condition = Blog.id.in_(select(blog_tags.c.blog_id).where(blog_tags.c.tag_id.in_(tags)))
+            else:
+                condition = _tagged(*tags)
+        else:
+            # rarest first, it rules out the most blogs
+            rarest, *others = sorted(tags, key=tags.get)
+            if tags[rarest] <= TAG_FILTER_SET_LIMIT:
+                first = Blog.id.in_(select(blog_tags.c.blog_id).where(blog_tags.c.tag_id == rarest))
+            else:
+                first = _tagged(rarest)
+            condition = and_(first, *(_tagged(tag_id) for tag_id in others))
+        blogs, next_cursor = await paginate(
+            db, blog_list_query("summary").where(condition), Blog.created_at, Blog.id, cursor, limit
+        )
+        return Page(items=blogs, next_cursor=next_cursor)
+
+    # most used tags, read off ix_tags_blog_count_id instead of counting blog_tags
+    @staticmethod
+    @handle_exceptions
+    async def get_tag_counts(db: AsyncSession, limit: int) -> list[Tag]:
+        stmt = (
+            select(Tag)
+            .where(Tag.blog_count > 0)
+            .order_by(Tag.blog_count.desc(), Tag.id.desc())
+            .limit(limit)
+        )
+        return list((await db.scalars(stmt)).all())
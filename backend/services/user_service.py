@@ -1,20 +1,32 @@
 from fastapi import Depends
-from sqlalchemy.orm import Session
-from .get_db_service import get_db
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from .get_db_service import get_read_db
 
 from models.users_models import User
 from models.blogs_models import Blog
 from schemas import users_schema, blogs_schema
+from schemas.pagination_schema import Page
 
 from exceptions.handlers import handle_exception
-import bcrypt
+from auth.password_hashing import PasswordHashServiceClass
+from auth.principal_cache import Principal, user_principal_cache
 from jwt import decode
-from email_validator import validate_email, EmailNotValidError
 from fastapi.security import OAuth2PasswordBearer
 import os
 from dotenv import load_dotenv
 
-from utils.services_utils import get_or_404, authorize_user, handle_exceptions
+from utils.email_utils import email_validation
+from utils.services_utils import get_or_404, authorize_user, handle_exceptions, raise_unique_violation
+from utils.pagination_utils import paginate
+from utils.conditional_utils import Validators, make_etag
+from services.search_service import SearchServicesClass
+from services.refresh_token_service import RefreshTokenServicesClass
+from services.public_blog_service import PublicBlogServicesClass
+from services.tag_service import TagServicesClass
+from utils.blog_query_utils import blog_list_query
 
 from jwt import PyJWTError, decode, ExpiredSignatureError
 
@@ -32,6 +44,12 @@ if not ALGORITHM:
 
 oauth2_scheme = OAuth2PasswordBearer("/api/1/users/token")
 
+# 400 details for the unique columns of the users table
+USER_UNIQUE_MESSAGES = {
+    "email": "Email already registered",
+    "username": "Username already taken",
+}
+
 
 class UserServicesClass:
     @staticmethod
@@ -43,73 +61,75 @@ class UserServicesClass:
     # Get user by email
     @staticmethod
     @handle_exceptions
-    async def get_user_by_email(email: str, db: Session) -> User | None: 
-        return db.query(User).filter(User.email == email).first()
+    async def get_user_by_email(email: str, db: AsyncSession) -> User | None: 
+        return await db.scalar(select(User).filter(User.email == email).limit(1))
 
     # Get user by username
     @staticmethod
     @handle_exceptions
-    async def get_user_by_username(username: str, db: Session) -> User | None: 
-        return db.query(User).filter(User.username == username).first()
+    async def get_user_by_username(username: str, db: AsyncSession) -> User | None: 
+        return await db.scalar(select(User).filter(User.username == username).limit(1))
 
     # Get user by ID
     @staticmethod
     @handle_exceptions
-    async def get_user_by_id(user_id: int, db: Session) -> User | None: 
-        return db.query(User).filter(User.id == user_id).first()
+    async def get_user_by_id(user_id: int, db: AsyncSession) -> User | None: 
+        return await db.get(User, user_id)
 
-    # Create a new user
+    # Create a new user, duplicates are caught by the unique constraints on insert
     @staticmethod
     @handle_exceptions
     async def create_user(
-        user: users_schema.UserCreate, db: Session
-    ) -> users_schema.User:
-        # Check for duplicate email
-        existing_user = await UserServicesClass.get_user_by_email(user.email, db)
-        if existing_user:
-            handle_exception(400, "Email already registered")
-
-        # Check for duplicate username
-        existing_username = await UserServicesClass.get_user_by_username(user.username, db)
-        if existing_username:
-            handle_exception(400, "Username already taken")
-
-        # Validate email format
-        try:
-            valid = validate_email(user.email)
-            email = valid.email
-        except EmailNotValidError:
-            handle_exception(400, "Invalid email format")
+        user: users_schema.UserCreate, db: AsyncSession
+    ) -> User:
+        # Validate and normalize the email, offline unless EMAIL_VALIDATION_MODE asks DNS
+        email = await email_validation.normalize(user.email)
 
         # Hash the password
-        hashed_password = bcrypt.hashpw(
-            user.password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
-        user_obj = User(
-            email=email, username=user.username, hashed_password=hashed_password
-        )
+        hashed_password = await PasswordHashServiceClass.hash_password(user.password)
 
-        # Save the user to the database
-        db.add(user_obj)
-        db.commit()
-        db.refresh(user_obj)
+        # Save the user to the database, RETURNING hands back id and defaults
+        try:
+            user_obj = await db.scalar(
+                insert(User)
+                .values(email=email, username=user.username, hashed_password=hashed_password)
+                .returning(User)
+            )
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise_unique_violation(e, USER_UNIQUE_MESSAGES)
         return user_obj
 
     # Authenticate user (email and password)
     @staticmethod
     @handle_exceptions
-    async def authenticate_user(email: str, password: str, db: Session) -> User | None:
+    async def authenticate_user(email: str, password: str, db: AsyncSession) -> User | None:
         user = await UserServicesClass.get_user_by_email(email=email, db=db)
-        if not user or not user.verify_password(password):
+        if not user:
             handle_exception(401, "Invalid email or password")
+        valid, new_hash = await PasswordHashServiceClass.verify_and_update(password, user.hashed_password)
+        if not valid:
+            handle_exception(401, "Invalid email or password")
+
+        # the hash predates the current algorithm or cost, store the new one.
+        # conditional, so a password changed meanwhile is not overwritten
+        if new_hash:
+            await db.execute(
+                update(User)
+                .where(User.id == user.id, User.hashed_password == user.hashed_password)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+            set_committed_value(user, "hashed_password", new_hash)
         return user
 
-    # Get the current user using the token
+    # Get the current user using the token, served from the principal cache when possible
     @staticmethod
     async def get_current_user(
         token: str = Depends(oauth2_scheme), 
-        db: Session = Depends(get_db)
-    ) -> User:
+        db: AsyncSession = Depends(get_read_db)
+    ) -> Principal:
         try:
             payload = decode(token, JWT_SECRET, algorithms=[ALGORITHM])
             user_id = payload.get("id")
@@ -117,11 +137,17 @@ class UserServicesClass:
             if not user_id:
                 raise handle_exception(401, "Invalid token: Missing user ID")
 
+            principal = user_principal_cache.get(user_id)
+            if principal:
+                return principal
+
             user = await UserServicesClass.get_user_by_id(user_id, db)
             if not user:
                 raise handle_exception(404, "User not found")
 
-            return user
+            principal = Principal.from_orm(user)
+            user_principal_cache.set(user_id, principal)
+            return principal
 
         except ExpiredSignatureError:
             print("Token expired")  
@@ -131,76 +157,108 @@ class UserServicesClass:
             print(f"JWT Error: {e}")  
             raise handle_exception(401, "Invalid token")
 
+    # ETag of the current user, built from the principal alone (users have no updated_at)
+    @staticmethod
+    def get_user_validators(user: User | Principal) -> Validators:
+        return Validators(
+            make_etag("user", user.id, user.email, user.username, user.date_created)
+        )
+
     # Get all users
     @staticmethod
     @handle_exceptions
-    async def get_all_users(db: Session) -> list[users_schema.User]:
-        users = db.query(User).all()
-        return list(map(users_schema.User.from_orm, users))
+    async def get_all_users(db: AsyncSession, cursor: str | None, limit: int) -> Page:
+        users, next_cursor = await paginate(
+            db, select(User), User.date_created, User.id, cursor, limit
+        )
+        # items stay ORM rows, the router validates them once while encoding
+        return Page(items=users, next_cursor=next_cursor)
 
     # Update user password
     @staticmethod
     @handle_exceptions
     async def update_user_password(
-        user: User, new_password: str, db: Session
+        user: User | Principal, new_password: str, db: AsyncSession
     ) -> User:
-        hashed_password = bcrypt.hashpw(
-            new_password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
-        user.hashed_password = hashed_password
-        db.commit()
-        db.refresh(user)
-        return user
-
-    # Update user data (username and email)
+        hashed_password = await PasswordHashServiceClass.hash_password(new_password)
+        updated = await db.scalar(
+            update(User)
+            .where(User.id == user.id)
+            .values(hashed_password=hashed_password)
+            .returning(User)
+        )
+        if not updated:
+            handle_exception(404, "User not found")
+        await db.commit()
+        user_principal_cache.invalidate(user.id)
+        return updated
+
+    # Update user data (username and email) in one UPDATE ... RETURNING,
+    # a taken username or email is caught by the unique constraints
     @staticmethod
     @handle_exceptions
     async def update_user(
-        user_update: users_schema.UserUpdate, db: Session, user: User
+        user_update: users_schema.UserUpdate, db: AsyncSession, user: User | Principal
     ) -> User:
-        # Check if the new username is already taken
-        if user_update.username:
-            existing_user = await UserServicesClass.get_user_by_username(
-                user_update.username, db
-            )
-            if existing_user and existing_user.id != user.id:
-                handle_exception(400, "Username already taken")
+        values = {key: value for key, value in user_update.model_dump().items() if value}
+        if not values:
+            return await get_or_404(User, db, id=user.id)
+        # stored the way signup stores it, or the unique constraint and login miss it
+        if "email" in values:
+            values["email"] = await email_validation.normalize(values["email"])
 
-        # Check if the new email is already registered
-        if user_update.email:
-            existing_user = await UserServicesClass.get_user_by_email(
-                user_update.email, db
+        try:
+            updated = await db.scalar(
+                update(User).where(User.id == user.id).values(**values).returning(User)
             )
-            if existing_user and existing_user.id != user.id:
-                handle_exception(400, "Email already registered")
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise_unique_violation(e, USER_UNIQUE_MESSAGES)
 
-        # Apply updates
-        if user_update.username:
-            user.username = user_update.username
-        if user_update.email:
-            user.email = user_update.email
-
-        db.commit()
-        db.refresh(user)
-        return user
+        if not updated:
+            handle_exception(404, "User not found")
+        user_principal_cache.invalidate(user.id)
+        return updated
 
     # Delete user
     @staticmethod
     @handle_exceptions
-    async def delete_user(db: Session, user: User) -> dict | None:
-        # Use the helper function get_or_404 to ensure the user exists
-        user = get_or_404(User, db, id=user.id)
-        db.delete(user)
-        db.commit()
+    async def delete_user(db: AsyncSession, user: User | Principal) -> dict | None:
+        # the user's blogs and their blog_tags rows go with it through ON DELETE
+        # CASCADE. what runs here is one FTS executemany per batch of
+        # FTS_DELETE_BATCH_SIZE blogs, the tag counter select and one UPDATE per
+        # distinct count change, the refresh token delete and the user delete:
+        # never a statement per blog
+        await SearchServicesClass.remove_blogs_of_owner(db, user.id)
+        await TagServicesClass.remove_blogs_of_owner(db, user.id)
+        await RefreshTokenServicesClass.delete_all(db, user.id, is_admin=False)
+        deleted = await db.scalar(delete(User).where(User.id == user.id).returning(User.id))
+        if deleted is None:
+            handle_exception(404, "User not found")
+        await db.commit()
+        user_principal_cache.invalidate(user.id)
+        PublicBlogServicesClass.invalidate_owner(user.id)
         return {}
 
     # Get all blogs for the current user
     @staticmethod
     @handle_exceptions
     async def get_all_blogs_for_current_user(
-        user: User, db: Session
-    ) -> list[blogs_schema.Blog]:
-        blogs = db.query(Blog).filter(Blog.owner_id == user.id).all()
-        if not blogs:
+        user: User | Principal,
+        db: AsyncSession,
+        cursor: str | None,
+        limit: int,
+        view: blogs_schema.BlogListView = "summary",
+    ) -> Page:
+        blogs, next_cursor = await paginate(
+            db,
+            blog_list_query(view).filter(Blog.owner_id == user.id),
+            Blog.created_at,
+            Blog.id,
+            cursor,
+            limit,
+        )
+        if not blogs and not cursor:
             handle_exception(404, "No blogs found")
-        return list(map(blogs_schema.Blog.from_orm, blogs))
+        return Page(items=blogs, next_cursor=next_cursor)
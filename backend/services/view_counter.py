@@ -0,0 +1,95 @@
+import asyncio
+import os
+from collections import Counter
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from dependencies.database import engine
+
+load_dotenv()
+
+# pending increments are written at least this often
+VIEW_COUNTER_FLUSH_SECONDS = float(os.getenv("VIEW_COUNTER_FLUSH_SECONDS", "5"))
+# ... or as soon as this many different blogs have pending views
+VIEW_COUNTER_MAX_PENDING = int(os.getenv("VIEW_COUNTER_MAX_PENDING", "1000"))
+
+# plain SQL: an ORM update would bump updated_at and with it every ETag
+FLUSH_SQL = text("UPDATE blogs SET view_count = view_count + :views WHERE id = :id")
+
+
+# write-behind view counts. a read only bumps an in-memory counter, a flusher
+# task writes the sums as one executemany UPDATE, so reads never wait on
+# SQLite's write lock. counts served meanwhile lag by up to one flush, and
+# views still pending when the process dies without a shutdown are lost.
+# only touched from the event loop, so it needs no locking
+class ViewCounter:
+    def __init__(self, flush_seconds: float, max_pending: int) -> None:
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.flushes = 0
+        self.flushed_views = 0
+        self._pending: Counter[int] = Counter()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def record(self, blog_id: int) -> None:
+        self._pending[blog_id] += 1
+        if len(self._pending) >= self.max_pending:
+            self._full.set()
+
+    def pending(self, blog_id: int) -> int:
+        return self._pending.get(blog_id, 0)
+
+    # writes every pending increment, returns how many views were written
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, Counter()
+        self._full.clear()
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(FLUSH_SQL, [{"id": blog_id, "views": views} for blog_id, views in batch.items()])
+        except BaseException:
+            # keep the views for the next attempt, added to those recorded meanwhile
+            self._pending.update(batch)
+            raise
+        self.flushes += 1
+        self.flushed_views += sum(batch.values())
+        return sum(batch.values())
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    # stops the flusher and writes what is still pending
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"View counter flush error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "pending_blogs": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+        }
+
+
+view_counter = ViewCounter(VIEW_COUNTER_FLUSH_SECONDS, VIEW_COUNTER_MAX_PENDING)
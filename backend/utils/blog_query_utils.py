@@ -0,0 +1,21 @@
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, with_expression
+
+from models.blogs_models import Blog
+from schemas import blogs_schema
+from utils.compression_utils import text_prefix
+
+
+# list query of the given view. Summaries load every column but content and
+# cut the excerpt inside SQLite, so the full posts never leave the database
+# (compressed posts only have the start of their stream inflated).
+# `columns` are loaded on top of those of a summary
+def blog_list_query(view: blogs_schema.BlogListView, *columns):
+    if view == "full":
+        return select(Blog)
+    return select(Blog).options(
+        load_only(
+            Blog.id, Blog.title, Blog.owner_id, Blog.created_at, Blog.updated_at, *columns, raiseload=True
+        ),
+        with_expression(Blog.excerpt, text_prefix(Blog.content, blogs_schema.BLOG_EXCERPT_LENGTH)),
+    )
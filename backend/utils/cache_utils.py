@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+# bounded LRU map whose entries also expire after `ttl` seconds;
+# only touched from the event loop, so it needs no locking
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# a failed load nobody waits for any more must not be logged as never retrieved
+def _retrieve_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+# bounded LRU of loaded values, by entry count and by total `size`, whose
+# entries expire after `ttl` seconds. concurrent misses of one key await a
+# single load (single-flight). only touched from the event loop
+class SingleFlightCache:
+    def __init__(self, maxsize: int, max_bytes: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._loads: dict[Hashable, asyncio.Task] = {}
+        # bumped by every invalidation, a load that overlapped one is not stored
+        self._epoch = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    # (value, outcome) where outcome is "hit", "miss" or "collapsed".
+    # `load` returns (value, size in bytes)
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[tuple[Any, int]]]) -> tuple[Any, str]:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value, "hit"
+
+        task = self._loads.get(key)
+        if task is None:
+            self.misses += 1
+            outcome = "miss"
+            # a task of its own, so the request that started it can go away mid-load
+            task = self._loads[key] = asyncio.create_task(self._load(key, load, self._epoch))
+            task.add_done_callback(_retrieve_exception)
+        else:
+            self.collapsed += 1
+            outcome = "collapsed"
+        return await asyncio.shield(task), outcome
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[tuple[Any, int]]], epoch: int) -> Any:
+        try:
+            value, size = await load()
+        finally:
+            del self._loads[key]
+        if epoch == self._epoch:
+            self._store(key, value, size)
+        return value
+
+    def _store(self, key: Hashable, value: Any, size: int) -> None:
+        if self.maxsize <= 0 or size > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while len(self._entries) > self.maxsize or self.bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def invalidate(self, key: Hashable) -> None:
+        self._epoch += 1
+        self._drop(key)
+
+    # drops every entry whose value matches, e.g. all blogs of a deleted owner
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> None:
+        self._epoch += 1
+        for key in [key for key, entry in self._entries.items() if predicate(entry[2])]:
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.collapsed
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,77 @@
+import os
+import zlib
+
+from dotenv import load_dotenv
+from sqlalchemy import String, func, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+load_dotenv()
+
+# bodies of at least this many UTF-8 bytes are stored zlib-compressed, 0 keeps them as text
+BLOG_COMPRESSION_THRESHOLD = int(os.getenv("BLOG_COMPRESSION_THRESHOLD", "0"))
+BLOG_COMPRESSION_LEVEL = int(os.getenv("BLOG_COMPRESSION_LEVEL", "6"))
+
+
+# compressed bodies are stored as BLOBs and plain ones as TEXT, so SQLite's own
+# storage class tells them apart and rows written either way can be mixed freely
+def compress_text(value, threshold: int = BLOG_COMPRESSION_THRESHOLD, level: int = BLOG_COMPRESSION_LEVEL):
+    if not isinstance(value, str) or threshold <= 0:
+        return value
+    data = value.encode("utf-8")
+    if len(data) < threshold:
+        return value
+    packed = zlib.compress(data, level)
+    # bodies that do not shrink stay text
+    return packed if len(packed) < len(data) else value
+
+
+def decompress_text(value):
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+# first `length` characters of a body from a prefix of its stored form, a
+# truncated zlib stream still inflates up to the point where it was cut
+def decompress_prefix(value, length: int):
+    if not isinstance(value, bytes):
+        return value[:length] if value else value
+    data = zlib.decompressobj().decompress(value, length * 4)
+    return data.decode("utf-8", errors="ignore")[:length]
+
+
+# text column that compresses long values on write and inflates them on read.
+# only queries that select the column pay for zlib, summaries and validators never do
+class CompressedText(TypeDecorator):
+    impl = String
+    cache_ok = True
+
+    def __init__(self, threshold: int = BLOG_COMPRESSION_THRESHOLD, level: int = BLOG_COMPRESSION_LEVEL):
+        super().__init__()
+        self.threshold = threshold
+        self.level = level
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value, self.threshold, self.level)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+class TextPrefix(TypeDecorator):
+    impl = String
+    cache_ok = True
+
+    def __init__(self, length: int):
+        super().__init__()
+        self.length = length
+
+    def process_result_value(self, value, dialect):
+        return decompress_prefix(value, self.length)
+
+
+# SQL expression for the first `length` characters of a CompressedText column.
+# SQLite cuts the stored value, enough bytes for `length` characters of UTF-8
+# even when zlib could not shrink them
+def text_prefix(column, length: int):
+    return type_coerce(func.substr(column, 1, length * 4 + 16), TextPrefix(length))
@@ -0,0 +1,89 @@
+import os
+from typing import Awaitable, Callable
+
+from dotenv import load_dotenv
+from email_validator import EmailNotValidError, validate_email
+
+from exceptions.handlers import handle_exception
+from utils.cache_utils import TTLCache
+
+load_dotenv()
+
+# "offline" checks syntax and normalizes, "deliverability" also asks DNS
+# whether the domain accepts mail
+EMAIL_VALIDATION_MODE = os.getenv("EMAIL_VALIDATION_MODE", "offline")
+if EMAIL_VALIDATION_MODE not in ("offline", "deliverability"):
+    raise RuntimeError(f"Unknown EMAIL_VALIDATION_MODE: {EMAIL_VALIDATION_MODE}")
+
+EMAIL_DNS_TIMEOUT_SECONDS = float(os.getenv("EMAIL_DNS_TIMEOUT_SECONDS", "3"))
+EMAIL_DNS_CACHE_SIZE = int(os.getenv("EMAIL_DNS_CACHE_SIZE", "10000"))
+EMAIL_DNS_CACHE_TTL_SECONDS = float(os.getenv("EMAIL_DNS_CACHE_TTL_SECONDS", "3600"))
+
+# async (ascii domain) -> whether it accepts mail
+DomainResolver = Callable[[str], Awaitable[bool]]
+
+
+# MX records, or an A/AAAA record as the implicit MX of RFC 5321. a null MX
+# ("MX 0 .") means the domain says it takes no mail
+async def dns_resolver(domain: str) -> bool:
+    import dns.asyncresolver
+    import dns.resolver
+
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = EMAIL_DNS_TIMEOUT_SECONDS
+    try:
+        answer = await resolver.resolve(domain, "MX")
+        return any(str(record.exchange) != "." for record in answer)
+    except dns.resolver.NXDOMAIN:
+        return False
+    except dns.resolver.NoAnswer:
+        pass
+
+    for record_type in ("A", "AAAA"):
+        try:
+            await resolver.resolve(domain, record_type)
+            return True
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            continue
+    return False
+
+
+class EmailValidation:
+    def __init__(
+        self,
+        mode: str = EMAIL_VALIDATION_MODE,
+        resolver: DomainResolver = dns_resolver,
+        cache: TTLCache | None = None,
+    ) -> None:
+        self.mode = mode
+        self.resolver = resolver
+        # per-domain answers, so a burst of signups from one provider asks DNS once
+        self.cache = cache if cache is not None else TTLCache(EMAIL_DNS_CACHE_SIZE, EMAIL_DNS_CACHE_TTL_SECONDS)
+
+    # the normalized address (lowercase domain, IDNA, NFC), or a 400
+    async def normalize(self, email: str) -> str:
+        try:
+            valid = validate_email(email, check_deliverability=False)
+        except EmailNotValidError:
+            handle_exception(400, "Invalid email format")
+
+        if self.mode == "deliverability" and not await self._deliverable(valid.ascii_domain):
+            handle_exception(400, "Email domain does not accept mail")
+        return valid.normalized
+
+    async def _deliverable(self, domain: str) -> bool:
+        cached = self.cache.get(domain)
+        if cached is not None:
+            return cached
+        try:
+            deliverable = await self.resolver(domain)
+        except Exception as e:
+            # a slow or broken resolver must not block signups, and the
+            # answer is not cached so the next signup asks again
+            print(f"Email deliverability check failed for {domain}: {e}")
+            return True
+        self.cache.set(domain, deliverable)
+        return deliverable
+
+
+email_validation = EmailValidation()
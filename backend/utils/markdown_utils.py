@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+from markdown_it import MarkdownIt
+
+# bump whenever the output of render_markdown changes (parser options, plugins,
+# markdown-it-py upgrades); rows rendered by an older version count as stale
+RENDERER_VERSION = 1
+
+
+# CommonMark plus tables and strikethrough. raw HTML in a post is escaped
+# instead of passed through, and markdown-it's link validation drops
+# javascript:, vbscript: and data: (except images) URLs, so the output is
+# safe to insert into a page as is
+@lru_cache(maxsize=1)
+def _parser() -> MarkdownIt:
+    return MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+
+# module level, so a ProcessPoolExecutor can pickle it by name
+def render_markdown(content: str | None) -> str:
+    return _parser().render(content or "")
+
+
+# the stored rendering when it is current, a fresh one otherwise
+def rendered_html(content: str | None, content_html: str | None, version: int | None) -> str:
+    if content_html is not None and version == RENDERER_VERSION:
+        return content_html
+    return render_markdown(content)
@@ -0,0 +1,219 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+# every collector here is only touched from the event loop thread (engine events
+# fire in SQLAlchemy's greenlet on that thread), so plain counters need no locks
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# what one request spent outside Python: SQL and password hashing
+@dataclass
+class RequestMetrics:
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    hash_seconds: float = 0.0
+
+
+current_request: ContextVar[RequestMetrics | None] = ContextVar("current_request", default=None)
+
+request_latency: dict[tuple[str, str], Histogram] = {}
+request_statements: dict[tuple[str, str], Histogram] = {}
+request_totals: dict[tuple[str, str, int], int] = {}
+db_seconds_total: dict[tuple[str, str], float] = {}
+password_hash = {"calls": 0, "seconds": 0.0}
+login_rejections: dict[tuple[str, str], int] = {}
+cache_read_latency: dict[tuple[str, str], Histogram] = {}
+
+
+def record_password_hash(seconds: float) -> None:
+    password_hash["calls"] += 1
+    password_hash["seconds"] += seconds
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.hash_seconds += seconds
+
+
+# a login attempt turned away by the throttle before any DB or bcrypt work
+def record_login_rejection(endpoint: str, reason: str) -> None:
+    login_rejections[(endpoint, reason)] = login_rejections.get((endpoint, reason), 0) + 1
+
+
+# time to answer from a response cache; outcome is "hit", "miss" or "collapsed"
+def record_cache_read(cache: str, outcome: str, seconds: float) -> None:
+    key = (cache, outcome)
+    if key not in cache_read_latency:
+        cache_read_latency[key] = Histogram(LATENCY_BUCKETS)
+    cache_read_latency[key].observe(seconds)
+
+
+def instrument_engine(sync_engine) -> None:
+    # the start time lives on the statement's own execution context, not on the
+    # pooled connection: after_cursor_execute never runs for a failed statement
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        metrics = current_request.get()
+        if metrics is not None:
+            metrics.db_statements += 1
+            metrics.db_seconds += elapsed
+
+
+# pure ASGI middleware, cheaper than BaseHTTPMiddleware on every request
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [
+                    *message["headers"],
+                    (b"server-timing", server_timing(metrics, time.perf_counter() - start).encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            # the route template, so /blogs/1 and /blogs/2 share one series
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            observe_request(scope["method"], path, status_code, time.perf_counter() - start, metrics)
+
+
+def server_timing(metrics: RequestMetrics, elapsed: float) -> str:
+    return (
+        f"app;dur={elapsed * 1000:.2f}, "
+        f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.db_statements} statements", '
+        f"hash;dur={metrics.hash_seconds * 1000:.2f}"
+    )
+
+
+def observe_request(method: str, route: str, status_code: int, elapsed: float, metrics: RequestMetrics) -> None:
+    key = (method, route)
+    if key not in request_latency:
+        request_latency[key] = Histogram(LATENCY_BUCKETS)
+        request_statements[key] = Histogram(STATEMENT_BUCKETS)
+        db_seconds_total[key] = 0.0
+    request_latency[key].observe(elapsed)
+    request_statements[key].observe(metrics.db_statements)
+    db_seconds_total[key] += metrics.db_seconds
+    request_totals[(method, route, status_code)] = request_totals.get((method, route, status_code), 0) + 1
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, series: dict[tuple[str, str], Histogram]) -> list[str]:
+    lines = []
+    for (method, route), histogram in series.items():
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+    return lines
+
+
+# Prometheus text exposition format 0.0.4; `caches` are TTLCache instances by name
+def render_prometheus(caches: dict | None = None) -> str:
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by route template.",
+        "# TYPE http_request_duration_seconds histogram",
+        *_histogram_lines("http_request_duration_seconds", request_latency),
+        "# HELP http_request_db_statements SQL statements executed per request.",
+        "# TYPE http_request_db_statements histogram",
+        *_histogram_lines("http_request_db_statements", request_statements),
+        "# HELP http_request_db_seconds_total Time spent in SQL statements.",
+        "# TYPE http_request_db_seconds_total counter",
+        *(
+            f"http_request_db_seconds_total{_labels(method=method, route=route)} {seconds}"
+            for (method, route), seconds in db_seconds_total.items()
+        ),
+        "# HELP http_requests_total Requests by route template and status.",
+        "# TYPE http_requests_total counter",
+        *(
+            f"http_requests_total{_labels(method=method, route=route, status=status)} {count}"
+            for (method, route, status), count in request_totals.items()
+        ),
+        "# HELP password_hash_seconds_total Time spent waiting on password hashing, queueing included.",
+        "# TYPE password_hash_seconds_total counter",
+        f"password_hash_seconds_total {password_hash['seconds']}",
+        "# HELP password_hash_calls_total Password hash and verify calls.",
+        "# TYPE password_hash_calls_total counter",
+        f"password_hash_calls_total {password_hash['calls']}",
+        "# HELP login_throttle_rejections_total Login attempts rejected by IP or account limits.",
+        "# TYPE login_throttle_rejections_total counter",
+        *(
+            f"login_throttle_rejections_total{_labels(endpoint=endpoint, reason=reason)} {count}"
+            for (endpoint, reason), count in login_rejections.items()
+        ),
+    ]
+    lines.extend(
+        [
+            "# HELP cache_read_duration_seconds Response cache lookups, loads included, by outcome.",
+            "# TYPE cache_read_duration_seconds histogram",
+        ]
+    )
+    for (cache, outcome), histogram in cache_read_latency.items():
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f"cache_read_duration_seconds_bucket{_labels(cache=cache, outcome=outcome, le=bound)} {cumulative}")
+        lines.append(f"cache_read_duration_seconds_sum{_labels(cache=cache, outcome=outcome)} {histogram.sum}")
+        lines.append(f"cache_read_duration_seconds_count{_labels(cache=cache, outcome=outcome)} {histogram.count}")
+    for metric, field, kind in (
+        ("cache_hits_total", "hits", "counter"),
+        ("cache_misses_total", "misses", "counter"),
+        ("cache_evictions_total", "evictions", "counter"),
+        ("cache_entries", "size", "gauge"),
+    ):
+        if caches:
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(
+                f"{metric}{_labels(cache=name)} {cache.stats()[field]}" for name, cache in caches.items()
+            )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from exceptions.handlers import handle_exception
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+# cursors are opaque to clients: base64 of the sort key of the last row sent
+def encode_key(*values) -> str:
+    raw = json.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_key(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        handle_exception(400, "Invalid cursor")
+
+
+def encode_cursor(created: datetime, row_id: int) -> str:
+    return encode_key(created.isoformat(), row_id)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created, row_id = decode_key(cursor)
+        return datetime.fromisoformat(created), int(row_id)
+    except HTTPException:
+        raise
+    except Exception:
+        handle_exception(400, "Invalid cursor")
+
+
+# the rows of one page plus the first row of the next, the extra one tells
+# whether there is a next page
+def keyset_page(stmt: Select, created_column, id_column, cursor: str | None, limit: int) -> Select:
+    if cursor:
+        stmt = stmt.where(tuple_(created_column, id_column) > tuple_(*decode_cursor(cursor)))
+    return stmt.order_by(created_column, id_column).limit(limit + 1)
+
+
+# keyset pagination on (created, id): seeks past the cursor through the composite
+# index instead of OFFSET, so every page costs the same however deep it is
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    created_column,
+    id_column,
+    cursor: str | None,
+    limit: int,
+) -> tuple[list[Any], str | None]:
+    stmt = keyset_page(stmt, created_column, id_column, cursor, limit)
+    rows = list((await db.scalars(stmt)).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, created_column.key), getattr(last, id_column.key)
+        )
+    return rows, next_cursor
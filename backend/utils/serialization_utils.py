@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+# one TypeAdapter per response shape, compiled on first use and kept for the process
+@lru_cache(maxsize=None)
+def response_adapter(shape: Any) -> TypeAdapter:
+    return TypeAdapter(shape)
+
+
+# validates ORM rows, result tuples or principals once against `shape` and
+# encodes the result to JSON inside pydantic-core
+def encode_response(shape: Any, content: Any) -> bytes:
+    adapter = response_adapter(shape)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+# routes keep `response_model=shape` for the OpenAPI schema; FastAPI passes a
+# returned Response through without validating and serializing it again
+def json_response(
+    shape: Any,
+    content: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    return Response(
+        encode_response(shape, content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
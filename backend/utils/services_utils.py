@@ -1,18 +1,31 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from exceptions.handlers import handle_exception
 from functools import wraps
 from typing import Callable, Any
 
 
 # function to get a resource or return 404
-def get_or_404(model, db: Session, **filters) -> Any:
-    obj = db.query(model).filter_by(**filters).first()
+async def get_or_404(model, db: AsyncSession, **filters) -> Any:
+    obj = await db.scalar(select(model).filter_by(**filters).limit(1))
     if not obj:
         handle_exception(404, f"{model.__name__} not found")
     return obj
 
 
+# function to turn a unique-constraint violation into the 400 of the violated column.
+# `messages` maps column name -> detail; anything else is re-raised unchanged
+def raise_unique_violation(error: IntegrityError, messages: dict[str, str]) -> None:
+    detail = str(error.orig)
+    for column, message in messages.items():
+        # sqlite: "UNIQUE constraint failed: users.email", postgres: "Key (email)=..."
+        if f".{column}" in detail or f"({column})" in detail:
+            handle_exception(400, message)
+    raise error
+
+
 # function for checking if the user is the owner of the resource
 def authorize_user(user, resource_owner_id) -> None:
     if user.id != resource_owner_id: